@@ -0,0 +1,96 @@
+"""
+Micro-benchmark: BeautifulSoup text/link extraction (the original scrape_text /
+scrape_internal_links code) against the single-pass extraction module.
+
+    python benchmarks/bench_extraction.py [page.html ...]
+
+Without arguments it runs on the saved pages in benchmarks/fixtures/: a company
+home page, its contact page, and a large marketing page with JSON-LD, noscript
+fallbacks and hidden blocks (mobile menu, tab panels, cookie banner).
+"""
+import glob
+import os
+import re
+import sys
+import time
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import extraction  # noqa: E402
+
+BASE_URL = "https://example.com/"
+REPEATS = 20
+CANONICAL = re.compile(r'<link rel="canonical" href="([^"]+)"')
+
+
+def bs4_text(html: str) -> str:
+    soup = BeautifulSoup(html, "html.parser")
+
+    for tag in soup(["script", "style", "noscript", "svg", "meta", "head"]):
+        tag.decompose()
+
+    for hidden in soup.select("[style*='display:none'], [style*='visibility:hidden']"):
+        hidden.decompose()
+
+    text = soup.get_text(separator="\n", strip=True)
+    return "\n".join([line.strip() for line in text.splitlines() if line.strip()])
+
+
+def bs4_links(html: str, url: str) -> list[str]:
+    soup = BeautifulSoup(html, "html.parser")
+    base_domain = urlparse(url).netloc
+    internal_links = []
+    for a_tag in soup.find_all("a", href=True):
+        href = a_tag["href"].strip()
+        if href.startswith("#") or href.lower().startswith(("javascript:", "mailto:", "tel:")):
+            continue
+        parsed_url = urlparse(urljoin(url, href))
+        if parsed_url.netloc == base_domain:
+            path = parsed_url.path
+            if path and path != "/":
+                internal_links.append(path)
+    return list(set(internal_links))
+
+
+def page_url(html: str) -> str:
+    """
+    The saved page's own URL, from its canonical link, so absolute same-site links count as internal.
+    """
+    match = CANONICAL.search(html)
+    return match.group(1) if match else BASE_URL
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        fn(*args)
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+
+def main():
+    paths = sys.argv[1:] or sorted(glob.glob(os.path.join(os.path.dirname(__file__), "fixtures", "*.html")))
+    backends = ["stdlib"] + (["lxml"] if extraction.etree is not None else [])
+
+    print(f"{'page':<24}{'KB':>7}{'bs4 ms':>10}" + "".join(f"{b + ' ms':>12}" for b in backends) + "  same output")
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        url = page_url(html)
+
+        baseline = timed(lambda h: (bs4_text(h), bs4_links(h, url)), html)
+        expected_text, expected_links = bs4_text(html), set(bs4_links(html, url))
+
+        row = f"{os.path.basename(path):<24}{len(html) / 1024:>7.0f}{baseline:>10.2f}"
+        same = []
+        for backend in backends:
+            row += f"{timed(extraction.extract_page, html, url, backend):>12.2f}"
+            page = extraction.extract_page(html, url, backend)
+            same.append(f"{backend}={'yes' if page.text == expected_text and set(page.links) == expected_links else 'no'}")
+        print(row + "  " + " ".join(same))
+
+
+if __name__ == "__main__":
+    main()
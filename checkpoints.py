@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import time
+
+CHECKPOINT_DIR = "generated/checkpoints"
+
+
+def input_hash(inputs) -> str:
+    """
+    Stable hash of a stage's JSON-serialisable inputs.
+    """
+    payload = json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _write_json(path: str, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class RowCheckpoint:
+    """
+    Per-row stage checkpoints.
+
+    Each stage's output is saved as `<stage>.json` in the row's directory and
+    `manifest.json` records every stage's status, input hash and finish time.
+    A stage whose inputs hash the same as in its last successful run is
+    loaded instead of recomputed, so a rerun only redoes the stages from the
+    first changed input onwards. Degraded output (failed searches or fetches,
+    an unparseable response) is used for the current run but recorded as
+    failed, so the next run redoes the stage.
+    """
+
+    def __init__(self, row: int, directory: str = CHECKPOINT_DIR):
+        self.row = row
+        self.directory = os.path.join(directory, f"row_{row}")
+        self.manifest_path = os.path.join(self.directory, "manifest.json")
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+
+    def _output_path(self, stage: str) -> str:
+        return os.path.join(self.directory, f"{stage}.json")
+
+    def _record(self, stage: str, status: str, digest: str, error: str | None = None):
+        self.manifest[stage] = {"status": status, "input_hash": digest, "finished_at": time.time(), "error": error}
+        _write_json(self.manifest_path, self.manifest)
+
+    def is_done(self, stage: str, inputs) -> bool:
+        entry = self.manifest.get(stage)
+        return bool(entry and entry["status"] == "done" and entry["input_hash"] == input_hash(inputs)
+                    and os.path.exists(self._output_path(stage)))
+
+    def invalidate(self, stage: str):
+        if self.manifest.pop(stage, None) is not None:
+            _write_json(self.manifest_path, self.manifest)
+
+    def run(self, stage: str, inputs, compute, degraded=None):
+        """
+        Returns the stage's checkpointed output, or computes and saves it.
+
+        Args:
+            stage (str): Stage name, e.g. "search".
+            inputs: JSON-serialisable values the stage depends on.
+            compute (callable): Called without arguments when the checkpoint is
+                missing or stale; must return a JSON-serialisable value.
+            degraded (callable | None): Called with an output, returns why it is
+                degraded or None. Degraded output is returned but not kept, and a
+                degraded checkpoint from an earlier run is recomputed.
+
+        Returns:
+            The stage output.
+        """
+        if self.is_done(stage, inputs):
+            with open(self._output_path(stage), encoding="utf-8") as f:
+                output = json.load(f)
+            reason = degraded(output) if degraded else None
+            if reason is None:
+                print(f"⏭️ Row {self.row}: reusing {stage} checkpoint")
+                return output
+            print(f"🔁 Row {self.row}: redoing {stage}, its checkpoint is degraded ({reason})")
+
+        digest = input_hash(inputs)
+        try:
+            output = compute()
+        except Exception as e:
+            self._record(stage, "failed", digest, f"{type(e).__name__}: {e}")
+            raise
+        reason = degraded(output) if degraded else None
+        if reason is not None:
+            print(f"⚠️ Row {self.row}: {stage} degraded ({reason}), it will be redone next run")
+            self._record(stage, "failed", digest, f"degraded: {reason}")
+            return output
+        _write_json(self._output_path(stage), output)
+        self._record(stage, "done", digest)
+        return output
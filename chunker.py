@@ -0,0 +1,109 @@
+import re
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+# Rough budget shared by chunking and prompts: about four characters per token
+CHARS_PER_TOKEN = 4
+CHUNK_TOKENS = 160
+CHUNK_OVERLAP_TOKENS = 16
+# Part of the "chunk" checkpoint inputs; bump it when the splitting rules change
+CHUNKER_VERSION = 2
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'“(\[A-Z0-9])")
+
+
+@dataclass
+class Chunk:
+    text: str
+    url: str | None = None
+    index: int = 0
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _units(text: str, max_tokens: int) -> Iterator[tuple[str, bool]]:
+    """
+    Yields (unit, starts_paragraph) pairs: sentences, with any sentence over
+    the budget split further at word boundaries, and any word over the budget
+    (a long URL, a base64 blob) cut into budget-sized pieces.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    for paragraph in text.splitlines():
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        first = True
+        for sentence in SENTENCE_END.split(paragraph):
+            if estimate_tokens(sentence) <= max_tokens:
+                yield sentence, first
+                first = False
+                continue
+            piece = []
+            for word in sentence.split():
+                while len(word) > max_chars:
+                    if piece:
+                        yield " ".join(piece), first
+                        first = False
+                        piece = []
+                    yield word[:max_chars], first
+                    first = False
+                    word = word[max_chars:]
+                if piece and estimate_tokens(" ".join(piece + [word])) > max_tokens:
+                    yield " ".join(piece), first
+                    first = False
+                    piece = []
+                piece.append(word)
+            if piece:
+                yield " ".join(piece), first
+                first = False
+
+
+def _join(units: list[tuple[str, bool]]) -> str:
+    text = ""
+    for unit, starts_paragraph in units:
+        text += ("\n" if starts_paragraph else " ") + unit if text else unit
+    return text
+
+
+def iter_chunks(pages: Iterable[tuple[str | None, str]], max_tokens: int = CHUNK_TOKENS,
+                overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> Iterator[Chunk]:
+    """
+    Splits page texts into chunks at paragraph and sentence boundaries.
+
+    Pages are consumed one at a time and chunks never span two pages, so each
+    chunk keeps the URL it came from. Sentences are packed greedily up to
+    `max_tokens`; each chunk after the first on a page starts with the last
+    sentences of the previous one, up to `overlap_tokens`.
+
+    Args:
+        pages (Iterable[tuple[str | None, str]]): (url, text) pairs, e.g. from `TieredFetcher.fetch_texts`.
+        max_tokens (int): Token budget per chunk (estimated from characters).
+        overlap_tokens (int): Tokens repeated from the previous chunk; 0 disables overlap.
+
+    Yields:
+        Chunk: Chunk text with its source URL and running index.
+    """
+    index = 0
+    for url, text in pages:
+        current, tokens = [], 0
+        for unit, starts_paragraph in _units(text or "", max_tokens):
+            unit_tokens = estimate_tokens(unit) + 1
+            if current and tokens + unit_tokens > max_tokens:
+                yield Chunk(_join(current), url, index)
+                index += 1
+                # Carry the tail of the chunk over, never the whole chunk
+                overlap, overlap_size = [], 0
+                for previous in reversed(current[1:]):
+                    size = estimate_tokens(previous[0]) + 1
+                    if overlap_size + size > min(overlap_tokens, max_tokens - unit_tokens):
+                        break
+                    overlap.insert(0, previous)
+                    overlap_size += size
+                current, tokens = overlap, overlap_size
+            current.append((unit, starts_paragraph))
+            tokens += unit_tokens
+        if current:
+            yield Chunk(_join(current), url, index)
+            index += 1
@@ -0,0 +1,88 @@
+"""
+Layout of the company_list.xlsx sheet.
+
+A: company name, B: website, C: description, D–R: extracted fields, S: sitemap URL.
+"""
+from openpyxl import load_workbook
+
+INPUT_COLUMNS = ["A", "B", "S"]
+
+# Extracted field written to each column, keyed the same as the extraction prompt's JSON
+FIELD_COLUMNS = {
+    "D": "software_classification",
+    "E": "is_enterprise_grade",
+    "F": "industry",
+    "G": "customer_name_list",
+    "H": "employee_head_count",
+    "I": "investors_list",
+    "J": "geography",
+    "K": "parent_company",
+    "L": "street",
+    "M": "postal/zip_code",
+    "N": "city",
+    "O": "country/region",
+    "P": "finance",
+    "Q": "email",
+    "R": "phone_number",
+}
+
+# List fields are stored as their str() in the sheet
+LIST_FIELDS = {"customer_name_list", "investors_list"}
+
+ALL_COLUMNS = [chr(c) for c in range(ord("A"), ord("S") + 1)]
+
+
+def is_unfilled(value) -> bool:
+    return value is None or str(value).strip() in ("None", "[]", "Not found")
+
+
+def read_record(sheet, row: int) -> dict:
+    """
+    Returns the row's cell values keyed by column letter (A–S).
+    """
+    return {col: sheet[f"{col}{row}"].value for col in ALL_COLUMNS}
+
+
+def read_records(sheet, start: int, end: int) -> dict[int, dict]:
+    """
+    Reads rows start..end in one pass over the sheet (works with read-only workbooks).
+
+    Returns:
+        dict[int, dict]: Row number to the record returned by `read_record`.
+    """
+    records = {}
+    for row, values in enumerate(
+        sheet.iter_rows(min_row=start, max_row=end, max_col=len(ALL_COLUMNS), values_only=True), start
+    ):
+        values = list(values) + [None] * (len(ALL_COLUMNS) - len(values))
+        records[row] = dict(zip(ALL_COLUMNS, values))
+    return records
+
+
+def load_records(workbook_path: str, start: int, end: int, sheet_name: str = "Sheet1") -> dict[int, dict]:
+    """
+    Reads rows start..end from the workbook with a streaming, read-only loader.
+
+    Returns:
+        dict[int, dict]: Row number to the record returned by `read_record`.
+    """
+    wb = load_workbook(workbook_path, read_only=True)
+    try:
+        return read_records(wb[sheet_name], start, end)
+    finally:
+        wb.close()
+
+
+def field_updates(record: dict, details: dict) -> dict:
+    """
+    Maps extracted details onto the columns that are still unfilled in the record.
+
+    Returns:
+        dict: Column letter to new cell value.
+    """
+    updates = {}
+    for col, field in FIELD_COLUMNS.items():
+        if is_unfilled(record.get(col)):
+            value = details.get(field, None)
+            updates[col] = str(value) if field in LIST_FIELDS else value
+    return updates
@@ -0,0 +1,146 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from sqlite_lru import evict_lru
+
+CRAWL_STORE_PATH = "generated/crawl_store.sqlite"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Query parameters that never change page content
+TRACKING_PARAMS = ("utm_", "gclid", "fbclid", "mc_cid", "mc_eid")
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normalises a URL so trivially different spellings share one store entry:
+    lowercase scheme and host, no default port, fragment or tracking parameters,
+    sorted query, and no trailing slash except on the root path.
+    """
+    parsed = urlparse(url.strip())
+    scheme = (parsed.scheme or "https").lower()
+    host = (parsed.hostname or "").lower()
+    if parsed.port and (scheme, parsed.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parsed.port}"
+    path = parsed.path.rstrip("/") or "/"
+    query = sorted((k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+                   if not k.lower().startswith(TRACKING_PARAMS))
+    return urlunparse((scheme, host, path, "", urlencode(query), ""))
+
+
+@dataclass
+class CrawledPage:
+    url: str
+    html: str
+    text: str
+    rendered: bool
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float
+
+
+class CrawlStore:
+    """
+    Persistent store of fetched pages keyed by canonical URL.
+
+    Keeps the zlib-compressed raw HTML, the extracted text, whether the page
+    was rendered in a browser, the fetch time and the ETag/Last-Modified
+    validators. Pages fetched within `fresh_for` seconds are served without
+    any network access; older ones can be revalidated with a conditional GET.
+    When the stored pages exceed `max_bytes`, the least recently used ones
+    are evicted.
+    """
+
+    def __init__(self, path: str = CRAWL_STORE_PATH, max_bytes: int = DEFAULT_MAX_BYTES,
+                 fresh_for: float = 7 * 24 * 3600):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.max_bytes = max_bytes
+        self.fresh_for = fresh_for
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                html BLOB NOT NULL,
+                text BLOB NOT NULL,
+                rendered INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_last_access ON pages (last_access)")
+        self._conn.commit()
+
+    def get(self, url: str) -> CrawledPage | None:
+        key = canonical_url(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT html, text, rendered, etag, last_modified, fetched_at FROM pages WHERE url = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+
+        html, text, rendered, etag, last_modified, fetched_at = row
+        return CrawledPage(key, zlib.decompress(html).decode("utf-8"), zlib.decompress(text).decode("utf-8"),
+                           bool(rendered), etag, last_modified, fetched_at)
+
+    def is_fresh(self, page: CrawledPage) -> bool:
+        return time.time() - page.fetched_at < self.fresh_for
+
+    def put(self, url: str, html: str, text: str, rendered: bool = False,
+            etag: str | None = None, last_modified: str | None = None):
+        """
+        Stores a fetched page and evicts old pages if the store is over its size cap.
+        """
+        html_blob = zlib.compress(html.encode("utf-8"), 6)
+        text_blob = zlib.compress(text.encode("utf-8"), 6)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (canonical_url(url), html_blob, text_blob, int(rendered), etag, last_modified, now, now,
+                 len(html_blob) + len(text_blob))
+            )
+            self._conn.commit()
+            self.evictions += evict_lru(self._conn, "pages", ["url"], "size", self.max_bytes)
+
+    def touch(self, url: str):
+        """
+        Marks a page as fresh again after a 304 Not Modified.
+        """
+        with self._lock:
+            self._conn.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), canonical_url(url)))
+            self._conn.commit()
+        self.revalidated += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
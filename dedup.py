@@ -0,0 +1,98 @@
+import hashlib
+import math
+import re
+from collections import Counter
+from urllib.parse import urlparse
+
+from chunker import Chunk
+
+WORD = re.compile(r"\w+")
+
+
+def _normalize(line: str) -> str:
+    return " ".join(line.lower().split())
+
+
+def strip_boilerplate(pages: list[tuple[str, str]], min_share: float = 0.5,
+                      min_pages: int = 2) -> tuple[list[tuple[str, str]], int]:
+    """
+    Removes lines repeated across a domain's pages (menus, cookie banners, footers).
+
+    A line counts as boilerplate when it appears on at least `min_share` of
+    the domain's pages, and on at least `min_pages` of them. It is kept on the
+    first page it appears on, so footer details such as an address, email or
+    phone number still reach the chunks once.
+
+    Args:
+        pages (list[tuple[str, str]]): (url, text) pairs.
+
+    Returns:
+        tuple[list[tuple[str, str]], int]: Cleaned pages in the same order, and
+        the number of lines removed.
+    """
+    by_domain = {}
+    for url, text in pages:
+        by_domain.setdefault(urlparse(url or "").netloc, []).append(text)
+
+    repeated = {}
+    for domain, texts in by_domain.items():
+        counts = Counter(line for text in texts for line in {_normalize(l) for l in text.splitlines()} if line)
+        threshold = max(min_pages, math.ceil(min_share * len(texts)))
+        repeated[domain] = {line for line, count in counts.items() if count >= threshold}
+
+    seen = set()
+    removed = 0
+    cleaned = []
+    for url, text in pages:
+        domain = urlparse(url or "").netloc
+        kept = []
+        for line in text.splitlines():
+            key = _normalize(line)
+            if key in repeated[domain]:
+                if (domain, key) in seen:
+                    removed += 1
+                    continue
+                seen.add((domain, key))
+            kept.append(line)
+        cleaned.append((url, "\n".join(kept)))
+    return cleaned, removed
+
+
+def simhash(text: str, bits: int = 64) -> int:
+    """
+    Similarity hash over word trigrams: near-identical texts differ in few bits.
+    """
+    words = WORD.findall(text.lower())
+    shingles = [" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))]
+    weights = [0] * bits
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=bits // 8).digest(), "big")
+        for bit in range(bits):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(bits) if weights[bit] > 0)
+
+
+def dedupe_chunks(chunks: list[Chunk], max_distance: int = 3) -> tuple[list[Chunk], int]:
+    """
+    Drops chunks whose simhash is within `max_distance` bits of an earlier chunk's.
+
+    The 64-bit hash is split into `max_distance + 1` bands; two hashes that
+    close must agree on at least one band, so only chunks sharing a band are compared.
+
+    Returns:
+        tuple[list[Chunk], int]: Kept chunks in order, and the number dropped.
+    """
+    bands = max_distance + 1
+    width = 64 // bands
+    mask = (1 << width) - 1
+    buckets = {}
+    kept = []
+    for chunk in chunks:
+        h = simhash(chunk.text)
+        keys = [(band, h >> (band * width) & mask) for band in range(bands)]
+        if any(bin(h ^ other).count("1") <= max_distance for key in keys for other in buckets.get(key, ())):
+            continue
+        for key in keys:
+            buckets.setdefault(key, []).append(h)
+        kept.append(chunk)
+    return kept, len(chunks) - len(kept)
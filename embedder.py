@@ -0,0 +1,176 @@
+import hashlib
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from rate_limiter import retry_with_backoff
+
+EMBEDDING_MODEL = "models/text-embedding-004"
+EMBEDDING_DIM = 768
+
+# The batchEmbedContents endpoint accepts at most 100 texts per request
+MAX_BATCH_SIZE = 100
+MAX_BATCH_CHARS = 60000
+
+
+class EmbeddingBackend:
+    """
+    Base class for embedding backends.
+
+    A backend embeds one batch of texts per call. Batching, concurrency and
+    retries are handled by `embed_texts`, so backends only talk to the model.
+    """
+    model = EMBEDDING_MODEL
+    dim = EMBEDDING_DIM
+    max_batch_size = MAX_BATCH_SIZE
+
+    def embed_batch(self, texts: list[str], task_type: str) -> list[list[float]]:
+        raise NotImplementedError
+
+    def is_quota_error(self, error: Exception) -> bool:
+        return False
+
+
+class GeminiEmbeddingBackend(EmbeddingBackend):
+    """
+    Embeds texts with the Google Generative AI embedding API, one
+    batchEmbedContents request per batch.
+    """
+
+    def __init__(self, model: str = EMBEDDING_MODEL):
+        self.model = model
+
+    def embed_batch(self, texts: list[str], task_type: str) -> list[list[float]]:
+        from google.generativeai import embedding
+
+        result = embedding.embed_content(
+            model=self.model,
+            content=texts,
+            task_type=task_type
+        )
+        return result["embedding"]
+
+    def is_quota_error(self, error: Exception) -> bool:
+        from google.api_core import exceptions
+
+        return isinstance(error, (
+            exceptions.ResourceExhausted,
+            exceptions.TooManyRequests,
+            exceptions.ServiceUnavailable,
+        ))
+
+
+class LocalEmbeddingBackend(EmbeddingBackend):
+    """
+    Deterministic offline stand-in for the embedding API.
+
+    Words are hashed into a fixed number of buckets and the result is
+    L2-normalised, so texts sharing words get similar vectors. Useful for
+    benchmarking the FAISS build and for running the pipeline without a key.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM, model: str = "local/hashing"):
+        self.dim = dim
+        self.model = model
+
+    def embed_batch(self, texts: list[str], task_type: str) -> list[list[float]]:
+        vectors = np.zeros((len(texts), self.dim), dtype="float32")
+        for row, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dim
+                sign = 1.0 if digest[4] & 1 else -1.0
+                vectors[row, bucket] += sign
+            norm = np.linalg.norm(vectors[row])
+            if norm:
+                vectors[row] /= norm
+        return vectors.tolist()
+
+
+def make_batches(texts: list[str], max_items: int = MAX_BATCH_SIZE,
+                 max_chars: int = MAX_BATCH_CHARS) -> list[tuple[int, int]]:
+    """
+    Splits texts into consecutive batches bounded by item count and total characters.
+
+    Returns:
+        list[tuple[int, int]]: (start, end) slices into `texts`.
+    """
+    batches = []
+    start, chars = 0, 0
+    for i, text in enumerate(texts):
+        if i > start and (i - start >= max_items or chars + len(text) > max_chars):
+            batches.append((start, i))
+            start, chars = i, 0
+        chars += len(text)
+    if start < len(texts):
+        batches.append((start, len(texts)))
+    return batches
+
+
+def embed_texts(texts: list[str], backend: EmbeddingBackend, task_type: str = "retrieval_document",
+                max_concurrency: int = 4, max_retries: int = 5, base_delay: float = 2.0,
+                cache=None) -> np.ndarray:
+    """
+    Embeds texts in size-bounded batches, running up to `max_concurrency` batches at once.
+
+    Quota errors are retried with exponential backoff and jitter; any other
+    error is raised straight away. When a cache is given, only texts missing
+    from it are sent to the backend.
+
+    Args:
+        texts (list[str]): Texts to embed.
+        backend (EmbeddingBackend): Backend that embeds one batch.
+        task_type (str): Embedding task type, e.g. "retrieval_document" or "retrieval_query".
+        max_concurrency (int): Maximum number of batches in flight.
+        max_retries (int): Retries per batch on quota errors.
+        base_delay (float): First backoff delay in seconds.
+        cache (EmbeddingCache | None): Optional persistent embedding cache.
+
+    Returns:
+        np.ndarray: float32 array of shape (len(texts), dim), in input order.
+    """
+    if not texts:
+        return np.zeros((0, backend.dim), dtype="float32")
+
+    if cache is not None:
+        cached = cache.get_many(backend.model, task_type, texts)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        if missing:
+            fresh = embed_texts([texts[i] for i in missing], backend, task_type,
+                                max_concurrency, max_retries, base_delay)
+            cache.put_many(backend.model, task_type, [texts[i] for i in missing], fresh)
+            for i, vector in zip(missing, fresh):
+                cached[i] = vector
+        return np.vstack(cached).astype("float32")
+
+    def run_batch(bounds: tuple[int, int]) -> list[list[float]]:
+        start, end = bounds
+        return retry_with_backoff(lambda: backend.embed_batch(texts[start:end], task_type), backend.is_quota_error,
+                                  max_retries, base_delay, label=f"Embedding batch {start}-{end}")
+
+    batches = make_batches(texts, max_items=backend.max_batch_size)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(batches)))) as pool:
+        results = list(pool.map(run_batch, batches))
+
+    return np.array([vector for batch in results for vector in batch], dtype="float32")
+
+
+if __name__ == "__main__":
+    # Offline benchmark of the embed + FAISS build path using the local backend
+    import faiss
+
+    words = "platform fraud enterprise customers investors address contact careers team about".split()
+    rng = random.Random(0)
+    chunks = [" ".join(rng.choices(words, k=60)) for _ in range(2000)]
+    backend = LocalEmbeddingBackend()
+
+    t0 = time.perf_counter()
+    vectors = embed_texts(chunks, backend)
+    t1 = time.perf_counter()
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(vectors)
+    t2 = time.perf_counter()
+    print(f"embedded {len(chunks)} chunks in {t1 - t0:.3f}s, built index in {t2 - t1:.3f}s")
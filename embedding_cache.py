@@ -0,0 +1,119 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from sqlite_lru import evict_lru
+
+DEFAULT_CACHE_PATH = "embeddings/embedding_cache.sqlite"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed cache of embedding vectors.
+
+    Entries are keyed by (model, task_type, sha256 of the text) and stored as
+    raw float32 bytes in a SQLite file. When the stored vectors exceed
+    `max_bytes`, the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                task_type TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model, task_type, text_hash)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON embeddings (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, task_type: str, texts: list[str]) -> list[np.ndarray | None]:
+        """
+        Looks up cached vectors for the texts.
+
+        Returns:
+            list[np.ndarray | None]: One float32 vector per text, or None on a miss.
+        """
+        hashes = [self.text_hash(text) for text in texts]
+        found = {}
+        with self._lock:
+            for i in range(0, len(hashes), 500):
+                part = list(set(hashes[i:i + 500]))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND task_type = ? "
+                    f"AND text_hash IN ({','.join('?' * len(part))})",
+                    [model, task_type, *part]
+                ).fetchall()
+                found.update(rows)
+
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE model = ? AND task_type = ? AND text_hash = ?",
+                    [(time.time(), model, task_type, h) for h in found]
+                )
+                self._conn.commit()
+
+        results = []
+        for h in hashes:
+            if h in found:
+                self.hits += 1
+                results.append(np.frombuffer(found[h], dtype="float32"))
+            else:
+                self.misses += 1
+                results.append(None)
+        return results
+
+    def put_many(self, model: str, task_type: str, texts: list[str], vectors: np.ndarray):
+        """
+        Stores vectors for the texts and evicts old entries if the cache is over its size cap.
+        """
+        now = time.time()
+        rows = [
+            (model, task_type, self.text_hash(text), np.asarray(vector, dtype="float32").tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+            self.evictions += evict_lru(self._conn, "embeddings", ["model", "task_type", "text_hash"],
+                                        "LENGTH(vector)", self.max_bytes)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
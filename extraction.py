@@ -0,0 +1,166 @@
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse
+
+try:
+    from lxml import etree
+except ImportError:  # lxml is optional, the stdlib parser is used without it
+    etree = None
+
+SKIP_TAGS = {"script", "style", "noscript", "svg", "meta", "head", "template"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+HIDDEN_STYLES = ("display:none", "visibility:hidden")
+
+
+@dataclass
+class PageContent:
+    text: str
+    links: list[str] = field(default_factory=list)
+
+
+class _Collector:
+    """
+    Parser-independent event handler: collects visible text lines and internal
+    link paths from start/end/data events in a single pass.
+    """
+
+    def __init__(self, base_url: str | None):
+        self.base_url = base_url
+        self.base_domain = urlparse(base_url).netloc if base_url else None
+        self.lines = []
+        self.links = {}
+        self._buffer = []
+        self._skip_tag = None
+        self._skip_depth = 0
+
+    def _flush(self):
+        if self._buffer:
+            for line in "".join(self._buffer).splitlines():
+                line = line.strip()
+                if line:
+                    self.lines.append(line)
+            self._buffer = []
+
+    def start(self, tag: str, attrs: dict):
+        self._flush()
+        # Links count even inside hidden or skipped elements, like scrape_internal_links
+        if tag == "a":
+            self._link(attrs)
+        if tag in VOID_TAGS:
+            return
+        if self._skip_tag:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+
+        style = attrs.get("style") or ""
+        if tag in SKIP_TAGS or any(hidden in style for hidden in HIDDEN_STYLES):
+            self._skip_tag, self._skip_depth = tag, 1
+
+    def end(self, tag: str):
+        self._flush()
+        if self._skip_tag and tag == self._skip_tag:
+            self._skip_depth -= 1
+            if self._skip_depth == 0:
+                self._skip_tag = None
+
+    def data(self, text: str):
+        if not self._skip_tag:
+            self._buffer.append(text)
+
+    def comment(self):
+        # BeautifulSoup ends a text node at a comment, so text on either side lands on separate lines
+        self._flush()
+
+    def close(self):
+        self._flush()
+
+    def _link(self, attrs: dict):
+        if self.base_domain is None:
+            return
+        href = (attrs.get("href") or "").strip()
+        # Skip anchors, javascript, or mailto links
+        if not href or href.startswith("#") or href.lower().startswith(("javascript:", "mailto:", "tel:")):
+            return
+        parsed_url = urlparse(urljoin(self.base_url, href))
+        if parsed_url.netloc == self.base_domain and parsed_url.path and parsed_url.path != "/":
+            self.links[parsed_url.path] = None
+
+
+class _StdlibParser(HTMLParser):
+    def __init__(self, collector: _Collector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.collector.start(tag, dict(attrs))
+        if tag not in VOID_TAGS:
+            self.collector.end(tag)
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+    def handle_comment(self, data):
+        self.collector.comment()
+
+
+class _LxmlTarget:
+    def __init__(self, collector: _Collector):
+        self.collector = collector
+
+    def start(self, tag, attrib):
+        self.collector.start(tag if isinstance(tag, str) else "", dict(attrib))
+
+    def end(self, tag):
+        self.collector.end(tag if isinstance(tag, str) else "")
+
+    def data(self, data):
+        self.collector.data(data)
+
+    def comment(self, text):
+        self.collector.comment()
+
+    def close(self):
+        self.collector.close()
+
+
+def extract_page(html: str, base_url: str | None = None, backend: str | None = None) -> PageContent:
+    """
+    Extracts visible text and internal links from an HTML document in one pass, without building a tree.
+
+    Text matches `scraper.scrape_text`: script/style/head-like elements and
+    inline-hidden elements are dropped and each non-empty line is stripped.
+    Links are the unique internal paths found in <a href>, like `scraper.scrape_internal_links`.
+
+    Args:
+        html (str): The document.
+        base_url (str | None): Page URL, needed to resolve and filter links.
+        backend (str | None): "lxml" or "stdlib"; defaults to lxml when installed.
+
+    Returns:
+        PageContent: Visible text and internal link paths.
+    """
+    collector = _Collector(base_url)
+    backend = backend or ("lxml" if etree is not None else "stdlib")
+
+    if backend == "lxml":
+        parser = etree.HTMLParser(target=_LxmlTarget(collector))
+        parser.feed(html)
+        parser.close()
+    else:
+        parser = _StdlibParser(collector)
+        parser.feed(html)
+        parser.close()
+        collector.close()
+
+    return PageContent("\n".join(collector.lines), list(collector.links))
+
+
+def extract_text(html: str) -> str:
+    return extract_page(html).text
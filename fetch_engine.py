@@ -0,0 +1,139 @@
+import asyncio
+import random
+import threading
+from urllib.parse import urlparse
+
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+
+from extraction import extract_text
+from rate_limiter import host_of, limiter
+from scraper import PROFILES, RenderProfile, fingerprints, should_block, stealth_scripts
+
+
+class FetchEngine:
+    """
+    Fetches pages concurrently from a pool of Playwright browser contexts and pages.
+
+    The engine runs its own asyncio loop on a background thread so the browser
+    pool survives across companies and can be driven from synchronous code
+    (including code that also uses the sync Playwright API). Each context gets
+    its own fingerprint, and at most `per_domain_limit` pages load from the
+    same host at once.
+    """
+
+    def __init__(self, contexts: int = 2, pages_per_context: int = 3, per_domain_limit: int = 3,
+                 profile: RenderProfile = PROFILES["fast"]):
+        self.contexts = contexts
+        self.pages_per_context = pages_per_context
+        self.per_domain_limit = per_domain_limit
+        self.profile = profile
+        self._loop = None
+        self._thread = None
+        self._playwright = None
+        self._browser = None
+        self._pages = None
+        self._domain_limits = {}
+
+    def start(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._run(self._start())
+
+    def close(self):
+        if self._loop is None:
+            return
+        self._run(self._close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    async def _start(self):
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(
+            headless=self.profile.headless, slow_mo=self.profile.slow_mo
+        )
+        self._pages = asyncio.Queue()
+
+        for _ in range(self.contexts):
+            fingerprint = random.choice(fingerprints)
+            context = await self._browser.new_context(
+                user_agent=fingerprint["user_agent"],
+                viewport={"width": 1920, "height": 1080},
+                locale="en-GB",
+                timezone_id="Europe/London"
+            )
+            for script in stealth_scripts(fingerprint):
+                await context.add_init_script(script)
+            if self.profile.blocked_resource_types or self.profile.blocked_hosts:
+                await context.route("**/*", self._route)
+            for _ in range(self.pages_per_context):
+                await self._pages.put(await context.new_page())
+
+    async def _route(self, route):
+        if should_block(self.profile, route.request.resource_type, route.request.url):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _close(self):
+        await self._browser.close()
+        await self._playwright.stop()
+
+    def _domain_limit(self, url: str) -> asyncio.Semaphore:
+        domain = urlparse(url).netloc
+        if domain not in self._domain_limits:
+            self._domain_limits[domain] = asyncio.Semaphore(self.per_domain_limit)
+        return self._domain_limits[domain]
+
+    async def fetch_page(self, url: str) -> tuple[str, str, str]:
+        """
+        Loads one URL on a pooled page and returns (url, rendered html, visible text).
+        Errors are logged and give empty html and text, like `scraper.scrape_text`.
+        """
+        html = ""
+        visible_text = ""
+        async with self._domain_limit(url):
+            await asyncio.sleep(limiter.reserve(host_of(url)))
+            page = await self._pages.get()
+            try:
+                response = await page.goto(url, timeout=self.profile.timeout_ms, wait_until=self.profile.wait_until)
+                limiter.report(host_of(url), response.status if response else None)
+                await page.wait_for_selector("body", timeout=15000)
+                if self.profile.settle_ms:
+                    await page.wait_for_timeout(self.profile.settle_ms)
+                html = await page.content()
+                visible_text = extract_text(html)
+
+                if not visible_text:
+                    print(f"⚠️ No visible text found at: {url}")
+
+            except PlaywrightTimeoutError:
+                print(f"❌ Timeout while loading {url}")
+            except Exception as e:
+                print(f"⚠️ Error scraping {url}: {e}")
+            finally:
+                self._pages.put_nowait(page)
+
+        return url, html, visible_text
+
+    async def _fetch_all(self, urls: list[str]) -> list[tuple[str, str, str]]:
+        results = []
+        for done in asyncio.as_completed([self.fetch_page(url) for url in dict.fromkeys(urls)]):
+            results.append(await done)
+        return results
+
+    def fetch_pages(self, urls: list[str]) -> list[tuple[str, str, str]]:
+        """
+        Fetches all URLs concurrently.
+
+        Returns:
+            list[tuple[str, str, str]]: (url, html, visible text) in completion order.
+        """
+        if not urls:
+            return []
+        return self._run(self._fetch_all(urls))
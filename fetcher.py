@@ -0,0 +1,219 @@
+import json
+import os
+import random
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from crawl_store import CrawlStore, CrawledPage
+from extraction import extract_text
+from fetch_engine import FetchEngine
+from rate_limiter import host_of, limiter
+from scraper import fingerprints
+from shared_state import connect_shared, immediate
+
+RENDER_DECISIONS_PATH = "generated/render_decisions.sqlite"
+# Where decisions were kept before; imported once into the database
+LEGACY_DECISIONS_PATH = "generated/render_decisions.json"
+
+# Status codes where a real browser may still get the page (bot walls, rate limits)
+ESCALATE_STATUSES = {401, 403, 429, 503}
+
+JS_SHELL_PATTERNS = re.compile(
+    r"enable javascript|javascript is (disabled|required)|you need to enable javascript"
+    r"|<div id=\"(root|app|__next|__nuxt)\"[^>]*>\s*</div>",
+    re.IGNORECASE
+)
+
+
+def looks_js_rendered(html: str, text: str, min_text_chars: int = 200) -> bool:
+    """
+    Guesses whether a statically fetched page needs a browser to show its content:
+    empty body, a noscript/"enable JavaScript" shell, an empty SPA root, or very little text.
+    """
+    if not text.strip() or len(text) < min_text_chars:
+        return True
+    return bool(JS_SHELL_PATTERNS.search(html)) and len(text) < min_text_chars * 5
+
+
+class TieredFetcher:
+    """
+    Fetches pages with a plain pooled HTTP GET first and only renders them in
+    Playwright when the static HTML looks JS-rendered or the request is blocked.
+
+    The decision is remembered per domain in a SQLite file shared by all
+    processes, so once a site is known to need a browser its pages go
+    straight to the FetchEngine.
+    With a `CrawlStore`, fresh pages are served from disk and stale ones are
+    revalidated with a conditional GET before anything is re-downloaded.
+    """
+
+    def __init__(self, engine: FetchEngine, max_workers: int = 8, min_text_chars: int = 200,
+                 timeout: float = 10, decisions_path: str = RENDER_DECISIONS_PATH,
+                 store: CrawlStore | None = None):
+        self.engine = engine
+        self.store = store
+        self.max_workers = max_workers
+        self.min_text_chars = min_text_chars
+        self.timeout = timeout
+        self.decisions_path = decisions_path
+        self.stats = {"stored": 0, "http": 0, "rendered": 0}
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "User-Agent": random.choice(fingerprints)["user_agent"],
+            "Accept-Language": "en-GB,en;q=0.9",
+        })
+
+        self._conn = connect_shared(decisions_path)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS decisions (domain TEXT PRIMARY KEY, decision TEXT NOT NULL)")
+        if os.path.exists(LEGACY_DECISIONS_PATH) and not self._conn.execute("SELECT 1 FROM decisions").fetchone():
+            with open(LEGACY_DECISIONS_PATH, encoding="utf-8") as f:
+                legacy = json.load(f)
+            with immediate(self._conn):
+                self._conn.executemany("INSERT OR IGNORE INTO decisions VALUES (?, ?)", legacy.items())
+        self.decisions = {}
+        self.reload()
+
+    def reload(self):
+        """
+        Picks up decisions other processes made since the last call.
+        """
+        with self._lock:
+            self.decisions = dict(self._conn.execute("SELECT domain, decision FROM decisions"))
+
+    def _remember(self, domain: str, decision: str):
+        with self._lock:
+            # Once a domain needs rendering it stays that way
+            if self.decisions.get(domain) == "render":
+                return
+            self.decisions[domain] = decision
+            self._conn.execute(
+                "INSERT INTO decisions VALUES (?, ?) ON CONFLICT(domain) DO UPDATE SET decision = excluded.decision "
+                "WHERE decision != 'render'",
+                (domain, decision)
+            )
+
+    def _revalidate(self, url: str, cached: CrawledPage) -> bool:
+        """
+        Asks the server whether a stored page changed, without downloading it if it did not.
+
+        Returns:
+            bool: True if the stored copy is still current (304 Not Modified).
+        """
+        headers = {}
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+        if not headers:
+            return False
+
+        try:
+            limiter.acquire(host_of(url))
+            with self.session.get(url, timeout=self.timeout, headers=headers, stream=True) as res:
+                limiter.report(host_of(url), res.status_code)
+                if res.status_code != 304:
+                    return False
+        except requests.RequestException:
+            return False
+        self.store.touch(url)
+        return True
+
+    def _from_store(self, url: str) -> str | None:
+        """
+        Returns the stored text for a URL if it is fresh or still valid, else None.
+        """
+        cached = self.store.get(url)
+        if cached and (self.store.is_fresh(cached) or self._revalidate(url, cached)):
+            return cached.text
+        return None
+
+    def fetch_static(self, url: str) -> tuple[str, str, bool]:
+        """
+        Fetches one URL over HTTP.
+
+        Returns:
+            tuple[str, str, bool]: (url, visible text, whether the page should be
+            rendered in a browser instead).
+        """
+        try:
+            limiter.acquire(host_of(url))
+            res = self.session.get(url, timeout=self.timeout)
+            limiter.report(host_of(url), res.status_code)
+        except requests.RequestException as e:
+            print(f"⚠️ HTTP fetch failed for {url}, rendering instead: {e}")
+            return url, "", True
+
+        if res.status_code in ESCALATE_STATUSES:
+            return url, "", True
+        if res.status_code != 200:
+            print(f"❌ {res.status_code} while loading {url}")
+            return url, "", False
+        if "html" not in res.headers.get("Content-Type", "html"):
+            return url, "", False
+
+        html = res.text
+        text = extract_text(html)
+        needs_render = looks_js_rendered(html, text, self.min_text_chars)
+        if self.store is not None and not needs_render:
+            self.store.put(url, html, text, etag=res.headers.get("ETag"),
+                           last_modified=res.headers.get("Last-Modified"))
+        return url, text, needs_render
+
+    def fetch_texts(self, urls: list[str]) -> list[tuple[str, str]]:
+        """
+        Fetches all URLs, serving stored pages first and escalating to the browser where needed.
+
+        A domain is remembered as needing rendering only when the browser
+        actually returned much more text than the static fetch.
+
+        Returns:
+            list[tuple[str, str]]: (url, visible text) pairs in completion order.
+        """
+        urls = list(dict.fromkeys(urls))
+        self.reload()
+        static_texts = {}
+        results = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            if self.store is not None:
+                for url, text in zip(urls, executor.map(self._from_store, urls)):
+                    if text is not None:
+                        self.stats["stored"] += 1
+                        results.append((url, text))
+                stored = {url for url, _ in results}
+                urls = [url for url in urls if url not in stored]
+
+            render = [url for url in urls if self.decisions.get(urlparse(url).netloc) == "render"]
+            static = [url for url in urls if url not in render]
+            for future in as_completed([executor.submit(self.fetch_static, url) for url in static]):
+                url, text, needs_render = future.result()
+                if needs_render:
+                    static_texts[url] = text
+                    render.append(url)
+                else:
+                    self._remember(urlparse(url).netloc, "http")
+                    self.stats["http"] += 1
+                    results.append((url, text))
+
+        if render:
+            self.stats["rendered"] += len(render)
+            for url, html, text in self.engine.fetch_pages(render):
+                if url in static_texts:
+                    static_text = static_texts[url]
+                    helped = len(text) > max(2 * len(static_text), len(static_text) + self.min_text_chars)
+                    self._remember(urlparse(url).netloc, "render" if helped else "http")
+                    text = text if len(text) >= len(static_text) else static_text
+                if self.store is not None and text:
+                    self.store.put(url, html, text, rendered=True)
+                results.append((url, text))
+        return results
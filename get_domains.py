@@ -1,16 +1,16 @@
 import requests
 from bs4 import BeautifulSoup
 import utils
-from openpyxl import load_workbook
-import random
-import time 
+from columns import load_records
+from rate_limiter import host_of, limiter
+from results_log import ResultsLog, materialize
 
-wb = load_workbook("company_list.xlsx")
-sheet = wb["Sheet1"]
 start = 120 # excel starting and ending row
 end = 186
 
-company_list = [str(cell.value).strip() for cell in sheet['A'] if cell.value][start-1: end]
+company_list = [str(record['A']).strip() for record in load_records("company_list.xlsx", start, end).values()
+                if record['A']]
+log = ResultsLog("domains")
 
 for company in company_list:
 
@@ -28,22 +28,22 @@ for company in company_list:
 
     url = "https://html.duckduckgo.com/html/"  # lightweight, HTML-only endpoint
 
+    limiter.acquire(host_of(url))
     response = requests.get(url, headers=headers, params=params)
+    limiter.report(host_of(url), response.status_code)
     soup = BeautifulSoup(response.text, "html.parser")
     
     result = soup.find("a", class_="result__a")
     title = result.get_text()
     link = utils.extract_real_url(result.get("href"))
     
-    pos = f'B{start}'
+    log.write(start, {'B': link})
     start+=1
-    sheet[pos] = link
 
     if start == end: 
-        wb.save('company_list.xlsx')
         break
 
-    time.sleep(random.uniform(2, 4))
+materialize('company_list.xlsx')
         
 
 
@@ -1,20 +1,19 @@
 from utils import find_sitemap_url
-from openpyxl import load_workbook
+from results_db import open_results_db
+from results_log import MATERIALIZE_EVERY, ResultsLog, materialize
 
 start, end = 65, 185
-# Load the workbook and select the active sheet
-wb = load_workbook("company_list.xlsx")
-sheet = wb.active
+# Only rows without a sitemap; results go to the log, not the workbook
+db = open_results_db()
+records = db.records(db.rows_missing("sitemap", start=start, end=end))
+db.close()
+log = ResultsLog("sitemaps")
 
-# Read cells from column B and store in a list
-sites = [sheet[f'B{row}'].value for row in range(start, end + 1)]
-for site in sites:
-    if sheet[f'S{start}'].value not in ["None", None]:
-        print(f'skipped {start}')
-        start+=1
-        continue
-    sheet[f'S{start}'] = str(find_sitemap_url(site))
-    print(f'Sitemap for {site} at {start}: {sheet[f'S{start}'].value}')
-    start += 1
-    wb.save("company_list.xlsx")
+for done, (row, record) in enumerate(records.items(), 1):
+    sitemap = str(find_sitemap_url(record['B']))
+    log.write(row, {'S': sitemap})
+    print(f"Sitemap for {record['B']} at {row}: {sitemap}")
+    if done % MATERIALIZE_EVERY == 0:
+        materialize("company_list.xlsx")
 
+materialize("company_list.xlsx")
@@ -0,0 +1,69 @@
+import math
+import re
+from collections import Counter
+
+import numpy as np
+
+TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it", "its",
+    "of", "on", "or", "that", "the", "this", "to", "was", "we", "were", "will", "with", "you", "your", "our",
+}
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class LexicalIndex:
+    """
+    In-memory BM25 inverted index over one company's chunks.
+
+    Built in one pass over the chunk texts and queried without any network
+    calls; scores are returned per chunk in input order so they can be
+    combined with dense distances over the same chunks.
+    """
+
+    def __init__(self, texts: list[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.size = len(texts)
+        self.lengths = np.zeros(self.size, dtype="float32")
+        self.postings = {}
+        for i, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            self.lengths[i] = sum(counts.values())
+            for token, count in counts.items():
+                self.postings.setdefault(token, []).append((i, count))
+        self.average_length = float(self.lengths.mean()) if self.size else 0.0
+
+    def idf(self, token: str) -> float:
+        frequency = len(self.postings.get(token, ()))
+        return math.log(1 + (self.size - frequency + 0.5) / (frequency + 0.5))
+
+    def scores(self, query: str) -> np.ndarray:
+        """
+        BM25 score of every chunk for the query; 0 for chunks sharing no term with it.
+        """
+        scores = np.zeros(self.size, dtype="float32")
+        if not self.size:
+            return scores
+        for token in set(tokenize(query)):
+            idf = self.idf(token)
+            for i, count in self.postings.get(token, ()):
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / (self.average_length or 1))
+                scores[i] += idf * count * (self.k1 + 1) / (count + norm)
+        return scores
+
+    def search(self, queries: list[str], k: int = 3) -> list[list[int]]:
+        """
+        Returns:
+            list[list[int]]: Indices of the top-k matching chunks per query, best
+            first; chunks that match no query term are never returned.
+        """
+        results = []
+        for query in queries:
+            scores = self.scores(query)
+            best = np.argsort(-scores, kind="stable")[:k]
+            results.append([int(i) for i in best if scores[i] > 0])
+        return results
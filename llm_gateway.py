@@ -0,0 +1,289 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from chunker import estimate_tokens
+from rate_limiter import retry_with_backoff
+from shared_state import connect_shared, immediate
+
+URL_MODEL = "models/gemini-2.0-flash"
+EXTRACTION_MODEL = "models/gemini-2.0-flash-lite"
+LLM_CACHE_PATH = "generated/llm_cache.sqlite"
+
+
+@dataclass
+class ModelLimits:
+    rpm: int = 15              # requests per minute
+    concurrency: int = 4       # requests in flight
+
+
+# Free-tier quotas of the models the scripts use
+MODEL_LIMITS = {
+    "models/gemini-2.0-flash": ModelLimits(rpm=15),
+    "models/gemini-2.0-flash-lite": ModelLimits(rpm=30),
+    "models/gemini-1.5-flash": ModelLimits(rpm=15),
+}
+
+
+@dataclass
+class Generation:
+    text: str
+    prompt_tokens: int
+    output_tokens: int
+
+
+class GenerationBackend:
+    """
+    Base class for text generation backends.
+
+    `generate` sends one prompt to one model and reports the tokens used;
+    `is_quota_error` tells `LLMGateway` which failures are worth retrying.
+    """
+
+    def generate(self, model: str, prompt: str) -> Generation:
+        raise NotImplementedError
+
+    def is_quota_error(self, error: Exception) -> bool:
+        return False
+
+
+class GeminiGenerationBackend(GenerationBackend):
+    """
+    Generates with the Google Generative AI API. Expects `genai.configure` to have been called.
+    """
+
+    def __init__(self):
+        self._models = {}
+
+    def generate(self, model: str, prompt: str) -> Generation:
+        import google.generativeai as genai
+
+        if model not in self._models:
+            self._models[model] = genai.GenerativeModel(model_name=model)
+        response = self._models[model].generate_content(prompt)
+        usage = getattr(response, "usage_metadata", None)
+        return Generation(
+            response.text,
+            getattr(usage, "prompt_token_count", None) or estimate_tokens(prompt),
+            getattr(usage, "candidates_token_count", None) or estimate_tokens(response.text),
+        )
+
+    def is_quota_error(self, error: Exception) -> bool:
+        from google.api_core import exceptions
+
+        return isinstance(error, (
+            exceptions.ResourceExhausted,
+            exceptions.TooManyRequests,
+            exceptions.ServiceUnavailable,
+            exceptions.DeadlineExceeded,
+        ))
+
+
+class FakeGenerationBackend(GenerationBackend):
+    """
+    Offline stand-in for the generation API.
+
+    Returns the response of the first `responses` entry whose key appears in
+    the prompt, else `default`. Calls are recorded in `calls` so tests can
+    check what was sent.
+    """
+
+    def __init__(self, responses: dict[str, str] | None = None, default: str = "Not found"):
+        self.responses = responses or {}
+        self.default = default
+        self.calls = []
+
+    def generate(self, model: str, prompt: str) -> Generation:
+        self.calls.append((model, prompt))
+        text = next((response for key, response in self.responses.items() if key in prompt), self.default)
+        return Generation(text, estimate_tokens(prompt), estimate_tokens(text))
+
+
+class ResponseCache:
+    """
+    Persistent cache of generated responses keyed by (model, sha256 of the prompt).
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                model TEXT NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                response TEXT NOT NULL,
+                prompt_tokens INTEGER NOT NULL,
+                output_tokens INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (model, prompt_hash)
+            )
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def prompt_hash(prompt: str) -> str:
+        return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+    def get(self, model: str, prompt: str) -> Generation | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, prompt_tokens, output_tokens FROM responses WHERE model = ? AND prompt_hash = ?",
+                (model, self.prompt_hash(prompt))
+            ).fetchone()
+        return Generation(*row) if row else None
+
+    def put(self, model: str, prompt: str, generation: Generation):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (model, self.prompt_hash(prompt), generation.text, generation.prompt_tokens,
+                 generation.output_tokens, time.time())
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _ModelSlot:
+    def __init__(self, model: str, limits: ModelLimits):
+        self.model = model
+        self.limits = limits
+        self.semaphore = threading.Semaphore(limits.concurrency)
+        self.sent = deque()
+        self.lock = threading.Lock()
+        self.conn = None
+
+    def _reserve(self) -> float:
+        """
+        Records a request and returns 0 if the model's last-minute window has room,
+        else returns how long to wait before trying again.
+        """
+        with self.lock:
+            if self.conn is None:
+                now = time.monotonic()
+                while self.sent and now - self.sent[0] >= 60:
+                    self.sent.popleft()
+                if len(self.sent) < self.limits.rpm:
+                    self.sent.append(now)
+                    return 0.0
+                return 60 - (now - self.sent[0])
+
+            with immediate(self.conn):
+                now = time.time()
+                self.conn.execute("DELETE FROM requests WHERE model = ? AND sent_at <= ?", (self.model, now - 60))
+                count, oldest = self.conn.execute(
+                    "SELECT COUNT(*), MIN(sent_at) FROM requests WHERE model = ?", (self.model,)
+                ).fetchone()
+                if count < self.limits.rpm:
+                    self.conn.execute("INSERT INTO requests VALUES (?, ?)", (self.model, now))
+                    return 0.0
+                return 60 - (now - oldest)
+
+    def wait_for_quota(self):
+        """
+        Blocks until sending one more request keeps the model within its requests-per-minute quota.
+        """
+        while (wait := self._reserve()) > 0:
+            time.sleep(wait)
+
+
+class LLMGateway:
+    """
+    Single entry point for every generation call.
+
+    Per model it enforces a concurrency limit and a requests-per-minute
+    quota, retries quota errors with exponential backoff and jitter, serves
+    repeated (model, prompt) pairs from a persistent cache, and counts
+    calls and tokens. The quota window is per process unless `share` points
+    it at a SQLite file, as the runner's workers do.
+    """
+
+    def __init__(self, backend: GenerationBackend, cache: ResponseCache | None = None,
+                 limits: dict[str, ModelLimits] | None = None, max_retries: int = 5, base_delay: float = 2.0):
+        self.backend = backend
+        self.cache = cache
+        self.limits = dict(MODEL_LIMITS if limits is None else limits)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.usage = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+        self._shared_path = None
+
+    def share(self, path: str):
+        """
+        Counts requests per minute in a SQLite file shared by every process using the same path.
+        Each model slot gets its own connection, since a connection holds one transaction at a time.
+        """
+        conn = connect_shared(path)
+        conn.execute("CREATE TABLE IF NOT EXISTS requests (model TEXT NOT NULL, sent_at REAL NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_requests_model ON requests (model, sent_at)")
+        conn.close()
+        with self._lock:
+            self._shared_path = path
+            for slot in self._slots.values():
+                with slot.lock:
+                    slot.conn = connect_shared(path)
+
+    def _slot(self, model: str) -> _ModelSlot:
+        with self._lock:
+            if model not in self._slots:
+                self._slots[model] = _ModelSlot(model, self.limits.get(model, ModelLimits()))
+                if self._shared_path is not None:
+                    self._slots[model].conn = connect_shared(self._shared_path)
+                self.usage[model] = {"calls": 0, "cached": 0, "retries": 0, "prompt_tokens": 0, "output_tokens": 0}
+            return self._slots[model]
+
+    def _count(self, model: str, **counts):
+        with self._lock:
+            for key, value in counts.items():
+                self.usage[model][key] += value
+
+    def generate(self, prompt: str, model: str = EXTRACTION_MODEL, cache_if=None) -> str:
+        """
+        Generates a response for the prompt, from the cache when possible.
+
+        Args:
+            cache_if (callable | None): Called with the response text; only responses
+                it accepts are cached or served from the cache, e.g. parseable JSON.
+
+        Returns:
+            str: The response text.
+        """
+        slot = self._slot(model)
+        if self.cache is not None:
+            cached = self.cache.get(model, prompt)
+            if cached is not None and (cache_if is None or cache_if(cached.text)):
+                self._count(model, cached=1)
+                return cached.text
+
+        def send() -> Generation:
+            slot.wait_for_quota()
+            with slot.semaphore:
+                return self.backend.generate(model, prompt)
+
+        generation = retry_with_backoff(send, self.backend.is_quota_error, self.max_retries, self.base_delay,
+                                        label=model, on_retry=lambda: self._count(model, retries=1))
+
+        self._count(model, calls=1, prompt_tokens=generation.prompt_tokens, output_tokens=generation.output_tokens)
+        if self.cache is not None and (cache_if is None or cache_if(generation.text)):
+            self.cache.put(model, prompt, generation)
+        return generation.text
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {model: dict(counts) for model, counts in self.usage.items()}
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.close()
+        for slot in self._slots.values():
+            if slot.conn is not None:
+                slot.conn.close()
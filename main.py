@@ -1,181 +1,262 @@
-import json
 import os
+from dataclasses import dataclass
 from dotenv import load_dotenv
-import numpy as np
 import google.generativeai as genai
-from google.generativeai import embedding
-from openpyxl import load_workbook
-from utils import get_all_sitemap_urls, get_leaf_sitemaps, clean_load_json, extract_paths_from_csv, is_valid_path
-from typing import List
-import faiss
-from scraper import create_browser, close_browser, scrape_text, ddg_results2, scrape_internal_links
+from utils import sitemap_paths, clean_load_json, extract_paths_from_csv, is_valid_path
+from sitemaps import SitemapCache, crawl_sitemap_tree
+from chunker import CHUNK_OVERLAP_TOKENS, CHUNK_TOKENS, CHUNKER_VERSION, iter_chunks
+from dedup import dedupe_chunks, strip_boilerplate
+from embedder import EmbeddingBackend, GeminiEmbeddingBackend, embed_texts
+from embedding_cache import EmbeddingCache
+from llm_gateway import EXTRACTION_MODEL, URL_MODEL, GeminiGenerationBackend, LLMGateway, ResponseCache
+from retrieval import (QUESTIONS, QUESTION_KEYWORDS, load_question_embeddings, build_context, choose_retrieval_mode,
+                       open_questions, retrieve_chunks)
+from structured_data import STRUCTURED_MIN_CONFIDENCE, STRUCTURED_VERSION, extract_structured
+from vector_store import VectorStore
+from scraper import PROFILES, RenderProfile, create_browser, close_browser, scrape_internal_links
+from search_cache import SearchCache
+from search_client import SearchClient
+from rate_limiter import limiter
+from fetch_engine import FetchEngine
+from fetcher import TieredFetcher
+from crawl_store import CrawlStore
+from columns import FIELD_COLUMNS, field_updates, is_unfilled
+from results_db import open_results_db
+from results_log import MATERIALIZE_EVERY, ResultsLog, materialize
+from checkpoints import RowCheckpoint
+from planner import RowPlan, plan_row
+from url_ranker import PATH_SHORTLIST, SITEMAP_SHORTLIST, confident_selection, shortlist_paths
 import tldextract
 from urllib.parse import urljoin, urlparse
 
 os.makedirs("embeddings", exist_ok=True)
 
-def chunk_text(text: str, max_chars: int = 360) -> List[str]:
+def embed_and_store(chunks: list[str], company_id: str, store: VectorStore, backend: EmbeddingBackend,
+                    cache: EmbeddingCache | None = None, sources: list[str] | None = None):
     """
-    Splits the input text into chunks of max_chars characters.
-    It tries to split at the nearest space to avoid cutting words.
-    """
-    chunks = []
-    start = 0
-    while start < len(text):
-        end = start + max_chars
-        if end < len(text):
-            # Try to split at the nearest space before max_chars
-            space_index = text.rfind(" ", start, end)
-            if space_index != -1:
-                end = space_index
-        chunks.append(text[start:end].strip())
-        start = end
-    return chunks
-
-def load_and_store_faiss(chunks: list[str], output_path: str):
-    """
-    Embeds each chunk using Google Generative AI and writes the FAISS index to disk.
+    Embeds the chunks in batches with the given backend and replaces the company's entries in the vector store.
 
     Args:
         chunks (list[str]): List of text chunks.
-        output_path (str): Path where the .index file should be saved.
+        company_id (str): ID the chunks are stored under, e.g. "cmp_186".
+        store (VectorStore): Consolidated vector store.
+        backend (EmbeddingBackend): Backend used to embed the chunks.
+        cache (EmbeddingCache | None): Cache consulted before calling the backend.
+        sources (list[str] | None): URL each chunk came from.
     """
     if not chunks:
         raise ValueError("Chunks list is empty.")
 
-    # Embed each chunk
-    embeddings = [
-        embedding.embed_content(
-            model="models/text-embedding-004",
-            content=chunk,
-            task_type="retrieval_document"
-        )["embedding"]
-        for chunk in chunks
-    ]
-
-    # Convert to numpy float32 array
-    embedding_array = np.array(embeddings, dtype="float32")
-
-    # Initialize FAISS index
-    dim = embedding_array.shape[1]
-    index = faiss.IndexFlatL2(dim)
-    index.add(embedding_array)
-
-    # Save index to file
-    faiss.write_index(index, output_path)
-    print(f"✅ FAISS index saved to: {output_path}")
-    return index
-
-
-load_dotenv()
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("GEMINI_API_KEY not found in .env")
+    # Embed uncached chunks in batches, several batches at once
+    embedding_array = embed_texts(chunks, backend, task_type="retrieval_document", cache=cache)
+
+    store.replace(company_id, chunks, embedding_array, sources)
+    print(f"✅ Stored {len(chunks)} vectors for {company_id} in: {store.directory}")
+
+
+# (name, on-site query, general query); the general query only runs when the on-site one found something
+SEARCHES = [
+    ("industry", "industry site:{domain}", "{name} company industry"),
+    ("employee", "total employees staffs count {name} site:{domain}", "{name} company employee count"),
+    ("parent_cmp", "parent company site:{domain}", "{name} parent company"),
+    ("address", "address location site:{domain}", "{name} company address"),
+]
+
+# (field, type) pairs asked for in the extraction prompt, in column order
+EXTRACTION_FIELDS = [
+    ("software_classification", "string"),
+    ("is_enterprise_grade", "string"),
+    ("industry", "string"),
+    ("customer_name_list", "list"),
+    ("employee_head_count", "number"),
+    ("investors_list", "list"),
+    ("geography", "string"),
+    ("parent_company", "string"),
+    ("street", "string"),
+    ("postal/zip_code", "string"),
+    ("city", "string"),
+    ("country/region", "string"),
+    ("finance", "string"),
+    ("email", "string"),
+    ("phone_number", "string"),
+]
+
+
+# The questions as worded in the URL selection prompts, in the same order as retrieval.QUESTIONS
+URL_QUESTIONS = [
+    "Software classification of company",
+    'Is company "enterprise grade" or "SMB"',
+    "Industry of company",
+    "Customer/client name list",
+    "Employee head count",
+    "Investors list",
+    "Geography",
+    "Parent company",
+    "Address of company",
+    "Finance",
+    "Email",
+    "Phone number",
+]
+
+
+def run_searches(cmp_name: str, base_domain: str, client: SearchClient,
+                 names: list[str] | None = None) -> tuple[dict, set, list[str]]:
+    """
+    Runs the `SEARCHES` queries for a company, each round concurrently.
 
+    Args:
+        names (list[str] | None): Only run these searches; the others get an empty context.
 
-genai.configure(api_key=api_key)
-m20 = genai.GenerativeModel(model_name="models/gemini-2.0-flash")
-m20l = genai.GenerativeModel(model_name="models/gemini-2.0-flash-lite")
-m15 = genai.GenerativeModel(model_name="models/gemini-1.5-flash")
+    Returns:
+        tuple[dict, set, list[str]]: Snippet context per search name, all result links,
+        and the queries that timed out or were blocked.
+    """
+    contexts = {name: "" for name, _, _ in SEARCHES}
+    links = set()
+    failed = []
+    searches = [search for search in SEARCHES if names is None or search[0] in names]
+
+    site_queries = {name: q.format(name=cmp_name, domain=base_domain) for name, q, _ in searches}
+    site_results = client.results_many(list(site_queries.values()))
+    found = [name for name, q in site_queries.items() if site_results[q][1]]
+    for name in found:
+        result_links, contexts[name] = site_results[site_queries[name]][1]
+        links.update(result_links)
+
+    general_queries = {name: q.format(name=cmp_name, domain=base_domain) for name, _, q in searches if name in found}
+    general_results = client.results_many(list(general_queries.values()))
+    for name, q in general_queries.items():
+        if general_results[q][1]:
+            result_links, snippets = general_results[q][1]
+            links.update(result_links)
+            contexts[name] += ' \n ' + snippets
+
+    for results in (site_results, general_results):
+        failed += [q for q, (status, _) in results.items() if status not in ("ok", "no_results")]
+    return contexts, links, failed
+
+
+def is_on_site(url: str, base_domain: str) -> bool:
+    """
+    True when the URL is on the company's domain or one of its subdomains.
+    """
+    host = urlparse(url.strip()).netloc.lower().split(":")[0].removeprefix("www.")
+    domain = base_domain.lower().removeprefix("www.")
+    return host == domain or host.endswith("." + domain)
 
-wb = load_workbook("company_list.xlsx")
-sheet = wb["Sheet1"]
 
-start, end = 186, 186
-# company_websites = [str(cell.value).strip() for cell in sheet['B'] if cell.value][start-1: end]
-# company_names = [str(cell.value).strip() for cell in sheet['A'] if cell.value][start-1: end]
+@dataclass
+class PipelineContext:
+    """
+    Model clients, stores and browser handles used to process rows.
+    Each worker process opens its own.
+    """
+    llm: LLMGateway
+    embedder: EmbeddingBackend
+    embedding_cache: EmbeddingCache
+    question_vectors: object
+    vector_store: VectorStore
+    playwright: object
+    browser: object
+    page: object
+    profile: RenderProfile
+    fetch_engine: FetchEngine
+    fetcher: TieredFetcher
+    crawl_store: CrawlStore
+    sitemap_cache: SitemapCache
+    search_cache: SearchCache
+    search_client: SearchClient
+
+
+def open_context(render_profile: str | None = None) -> PipelineContext:
+    """
+    Opens model clients, stores and browsers for processing rows.
 
-playwright, browser, page = create_browser()
+    Args:
+        render_profile (str | None): Name of a `scraper.PROFILES` entry; defaults
+            to the RENDER_PROFILE environment variable, then "fast".
+    """
+    load_dotenv()
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY not found in .env")
+
+    genai.configure(api_key=api_key)
+    embedder = GeminiEmbeddingBackend()
+    embedding_cache = EmbeddingCache()
+    profile = PROFILES[render_profile or os.getenv("RENDER_PROFILE", "fast")]
+    playwright, browser, page = create_browser(profile)
+    fetch_engine = FetchEngine(profile=profile)
+    fetch_engine.start()
+    search_cache = SearchCache()
+    crawl_store = CrawlStore()
+
+    return PipelineContext(
+        llm=LLMGateway(GeminiGenerationBackend(), ResponseCache()),
+        embedder=embedder,
+        embedding_cache=embedding_cache,
+        question_vectors=load_question_embeddings(embedder, cache=embedding_cache),
+        vector_store=VectorStore(),
+        playwright=playwright,
+        browser=browser,
+        page=page,
+        profile=profile,
+        fetch_engine=fetch_engine,
+        fetcher=TieredFetcher(fetch_engine, store=crawl_store),
+        crawl_store=crawl_store,
+        sitemap_cache=SitemapCache(),
+        search_cache=search_cache,
+        search_client=SearchClient(cache=search_cache),
+    )
+
+
+def close_context(ctx: PipelineContext):
+    print(f"Fetcher: {ctx.fetcher.stats}")
+    ctx.fetch_engine.close()
+    print(f"Crawl store: {ctx.crawl_store.stats()}")
+    ctx.crawl_store.close()
+    close_browser(ctx.playwright, ctx.browser)
+    print(f"Embedding cache: {ctx.embedding_cache.stats()}")
+    ctx.embedding_cache.close()
+    ctx.vector_store.close()
+    print(f"Sitemap cache: {ctx.sitemap_cache.stats()}")
+    ctx.sitemap_cache.close()
+    print(f"Search cache: {ctx.search_cache.stats()}")
+    print(f"Rate limiter: {limiter.stats()}")
+    ctx.search_cache.close()
+    print(f"LLM usage: {ctx.llm.stats()}")
+    ctx.llm.close()
+
+
+def select_urls(record: dict, base_domain: str, ddg_links: set, ctx: PipelineContext,
+                plan: RowPlan | None = None) -> list[str]:
+    """
+    Picks the company pages to scrape from its sitemaps, or from the homepage
+    links when there is no usable sitemap, with the search result paths added.
 
-for row in range(start, end+1):
-        
-    extracted = tldextract.extract(sheet[f'B{row}'].value)
-    if 'eu' in extracted.registered_domain:
-        base_domain = f'{extracted.subdomain}.{extracted.registered_domain}'
-    else:
-        base_domain = f"{extracted.domain}.{extracted.suffix}"
+    Args:
+        plan (RowPlan | None): When given, the prompts only ask about the planned
+            questions and the ranker only needs to cover the planned URL topics.
 
-    chat = m20l.start_chat()
-    chat.send_message('For the following prompts just answer to the point, if answer not found give "Not found"')
-    cmp_name = sheet[f'A{row}'].value
-    ddg_links = set()
-
-
-    query = f'industry site:{base_domain}' # F
-    query2 = f'{cmp_name} company industry'
-    # links, industry_context = ddg_results2(query, page)
-    industry_context = ""
-    ddg_res = ddg_results2(query, page)
-    if ddg_res:
-        links, industry_context = ddg_res
-        ddg_links.update(links)
-        links, r2 = ddg_results2(query2, page)
-        ddg_links.update(links)
-        industry_context +=' \n '+ r2
-
-
-    query = f'total employees staffs count {cmp_name} site:{base_domain}'  # H
-    query2 = f'{cmp_name} company employee count'
-    employee_context = ""
-    ddg_res = ddg_results2(query, page)
-    if ddg_res:
-        links, employee_context = ddg_res
-        ddg_links.update(links)
-        ddg_res2 = ddg_results2(query2, page)
-        if ddg_res2:
-            links, r2 = ddg_res2
-            ddg_links.update(links)
-            employee_context += ' \n ' + r2
-
-    # Parent Company
-    query = f'parent company site:{base_domain}'  # K
-    query2 = f'{cmp_name} parent company'
-    parent_cmp_context = ""
-    ddg_res = ddg_results2(query, page)
-    if ddg_res:
-        links, parent_cmp_context = ddg_res
-        ddg_links.update(links)
-        ddg_res2 = ddg_results2(query2, page)
-        if ddg_res2:
-            links, r2 = ddg_res2
-            ddg_links.update(links)
-            parent_cmp_context += ' \n ' + r2
-
-    # Address or Location
-    query = f'address location site:{base_domain}'
-    query2 = f'{cmp_name} company address'
-    address_context = ""
-    ddg_res = ddg_results2(query, page)
-    if ddg_res:
-        links, address_context = ddg_res
-        ddg_links.update(links)
-        ddg_res2 = ddg_results2(query2, page)
-        if ddg_res2:
-            links, r2 = ddg_res2
-            ddg_links.update(links)
-            address_context += ' \n ' + r2
-    chat.history.clear()
-    ddg_links = set(map(lambda x: urlparse(x.strip()).path, ddg_links))
-
-    leaf_sitemaps = get_leaf_sitemaps(sheet[f'S{row}'].value)
-    leaf_sitemaps = list(map(lambda x: urlparse(x.strip()).path, leaf_sitemaps))
+    Returns:
+        list[str]: Absolute URLs to scrape.
+    """
+    asked = plan.questions if plan else range(len(URL_QUESTIONS))
+    questions = "\n        ".join(f"{n}. {URL_QUESTIONS[i]}" for n, i in enumerate(asked, 1))
+    topics = plan.url_topics if plan else None
+
+    # Fetch the whole sitemap tree once; leaves and page URLs both come from it
+    sitemap_tree = None
+    if record['S'] and record['S'].strip() != "None":
+        sitemap_tree = crawl_sitemap_tree(record['S'].strip(), fetch=ctx.sitemap_cache.fetch)
+    leaves = sitemap_tree.leaves() if sitemap_tree else []
+    leaf_sitemaps = list(map(lambda x: urlparse(x.url.strip()).path, leaves))
     if len(leaf_sitemaps) > 1:
         print('company has multiple sitemaps')
-        paths = "\n".join(leaf_sitemaps)
+        paths = "\n".join(candidate.path for candidate in shortlist_paths(leaf_sitemaps, SITEMAP_SHORTLIST))
         prompt = f"""
         To answer these questions, what are all the sitemap urls would you require:
-        1. Software classification of company
-        2. Is company "enterprise grade" or "SMB"
-        3. Industry of company
-        4. Customer/client name list
-        5. Employee head count
-        6. Investors list
-        7. Geography
-        8. Parent company
-        9. Address of company
-        10. Finance 
-        11. Email
-        12. Phone number
+        {questions}
 
         Available URLs:
         {paths}
@@ -184,14 +265,14 @@ for row in range(start, end+1):
         If no relevant sitemaps found return just the homepage URL "/".
         Generate ONLY the URLs as comma separated values, don't generate any other extra explanations or texts
         """
-        required_paths = m20.generate_content(prompt).text
+        required_paths = ctx.llm.generate(prompt, URL_MODEL)
         required_paths = extract_paths_from_csv(required_paths)
     else:
         print('company has single sitemap')
         required_paths = leaf_sitemaps
 
     sitemap_failed = False
-    if (sheet[f'S{row}'].value is None or sheet[f'S{row}'].value.strip() == "None") \
+    if (record['S'] is None or record['S'].strip() == "None") \
     or (len(required_paths)==0 or not is_valid_path(required_paths[0]) or required_paths[0].strip() == "/"):
         sitemap_failed = True
         print('sitemap failed')
@@ -200,25 +281,17 @@ for row in range(start, end+1):
         print('getting sitemap urls')
         paths = []
         for path in required_paths:
-            paths.append(get_all_sitemap_urls('https://'+ base_domain +path))
-        
-        paths = [item for sublist in paths for item in sublist]
-        paths = "\n".join(paths)
+            chosen = [leaf for leaf in leaves if urlparse(leaf.url).path == path]
+            if not chosen:
+                chosen = crawl_sitemap_tree('https://'+ base_domain +path, fetch=ctx.sitemap_cache.fetch).leaves()
+            paths.extend(sitemap_paths(chosen))
+
+        ranked = shortlist_paths(paths, PATH_SHORTLIST)
+        paths = "\n".join(candidate.path for candidate in ranked)
 
         prompt = f"""
         To answer these questions, what are all the URLs would you require:
-        1. Software classification of company
-        2. Is company "enterprise grade" or "SMB"
-        3. Industry of company
-        4. Customer/client name list
-        5. Employee head count
-        6. Investors list
-        7. Geography
-        8. Parent company
-        9. Address of company
-        10. Finance 
-        11. Email
-        12. Phone number
+        {questions}
 
         Available URLs:
         {paths}
@@ -227,52 +300,30 @@ for row in range(start, end+1):
         If no relevant URLs found return just the homepage URL "/".
         Generate ONLY the URLs as comma separated values, don't generate any other extra explanations or texts
         """
-        required_paths = m20.generate_content(prompt).text
-        required_paths = extract_paths_from_csv(required_paths)
+        required_paths = confident_selection(ranked, topics=topics)
+        if required_paths:
+            print(f'🎯 ranker picked {len(required_paths)} urls, skipping the LLM')
+        else:
+            required_paths = extract_paths_from_csv(ctx.llm.generate(prompt, URL_MODEL))
         if len(required_paths)==0 or not is_valid_path(required_paths[0]) or required_paths[0].strip() == "/":
             sitemap_failed = True
             print('no useful urls found')
 
         else:
-            print('scraping siemaps')
             required_paths = set(required_paths) | ddg_links
             required_paths = set(map(lambda x: x.rstrip('/'), required_paths))
             
-            scraped_text= []
-            try :
-                if '/' not in required_paths:
-                    text = scrape_text(page, f'https://{base_domain}/')
-                    scraped_text.append(text)
-            except Exception as e:
-                print(f"Error scraping homepage: {e}")
-
-            for path in required_paths:
-                if path:
-                    try:
-                        url = urljoin('https://'+ base_domain, path)
-                        text = scrape_text(page, url)
-                        print(f'for the url {url} the extraction is {len(text)}')
-                        scraped_text.append(text)
-                    except Exception as e:
-                        print(f"Error scraping {path}: {e}")
+            urls = [urljoin('https://'+ base_domain, path) for path in required_paths if path]
+            if '/' not in required_paths:
+                urls.insert(0, f'https://{base_domain}/')
     
     if sitemap_failed:
-        paths = scrape_internal_links(page, f'https://{base_domain}/')
-        paths = "\n".join(paths)
+        paths = scrape_internal_links(ctx.page, f'https://{base_domain}/', ctx.profile, ctx.crawl_store)
+        ranked = shortlist_paths(paths, PATH_SHORTLIST)
+        paths = "\n".join(candidate.path for candidate in ranked)
         prompt = f"""
         To answer these questions, what are all the URLs would you require:
-        1. Software classification of company
-        2. Is company "enterprise grade"  or "SMB"
-        3. Industry of company
-        4. Customer/client name list
-        5. Employee head count
-        6. Investors list
-        7. Geography
-        8. Parent company
-        9. Address of company
-        10. Finance 
-        11. Email
-        12. Phone number
+        {questions}
 
         Available URLs:
         {paths}
@@ -281,90 +332,165 @@ for row in range(start, end+1):
         If no relevant URLs found return just the homepage URL "/".
         Generate ONLY the URLs as comma separated values, don't generate any other extra explanations or texts
         """
-        required_paths = m20.generate_content(prompt).text
-        required_paths = extract_paths_from_csv(required_paths)
+        required_paths = confident_selection(ranked, topics=topics)
+        if required_paths:
+            print(f'🎯 ranker picked {len(required_paths)} urls, skipping the LLM')
+        else:
+            required_paths = extract_paths_from_csv(ctx.llm.generate(prompt, URL_MODEL))
         required_paths = set(required_paths) | ddg_links
         required_paths = set(map(lambda x: x.rstrip('/'), required_paths))
 
-        scraped_text= []
-        for path in required_paths:
-            try:
-                url = urljoin('https://'+ base_domain, path)
-                text = scrape_text(page, url)
-                print(f'for the url {url} the extraction is {len(text)}')
-                scraped_text.append(text)
-            except Exception as e:
-                print(f"Error scraping {path}: {e}")
-        
-        scraped_text = "\n".join(scraped_text)
-
-    chunks = chunk_text(" ".join(scraped_text))
-    with open(f'generated/chunks_cmp_{row}.json', 'w', encoding="utf-8") as f:
-        json.dump(chunks, f, ensure_ascii=False, indent=4)
-        
-    index = load_and_store_faiss(chunks, f'embeddings/cmp_{row}.index')
-
-    questions = [
-        "Software classification of company",
-        "Is the company 'enterprise grade' or 'SMB'",
-        "Industry of company",
-        "Customer/client name list",
-        "Employee or staff head count",
-        "Investors list",
-        "Geography",
-        "Parent company",
-        "Full address or location of company",
-        "Finance details",
-        "Email of company",
-        "Phone number of company"
-    ]
-
-    # This will hold all retrieved chunks across questions
-    context = ""
-
-    for question in questions:
-        try:
-            # Embed the question
-            query_embedding = embedding.embed_content(
-                model="models/text-embedding-004",
-                content=question
-            )["embedding"]
-
-            # Search top k chunks
-            k = 3
-            D, I = index.search(np.array([query_embedding], dtype="float32"), k=k)
-
-            # Add the top chunks to the context
-            retrieved_chunks = "\n\n".join([chunks[i] for i in I[0]])
-            context += f"\n\n=== context for: {question} ===\n\n{retrieved_chunks}"
-
-        except Exception as e:
-            print(f"Error with question '{question}': {e}")
+        urls = [urljoin('https://'+ base_domain, path) for path in required_paths]
+
+    return urls
+
+
+
+def scrape_pages(urls: list[str], ctx: PipelineContext) -> list[list[str]]:
+    """
+    Fetches the pages' visible text.
+
+    Returns:
+        list[list[str]]: [url, text] pairs in the order of `urls`.
+    """
+    texts = {}
+    for url, text in ctx.fetcher.fetch_texts(urls):
+        print(f'for the url {url} the extraction is {len(text)}')
+        texts[url] = text
+    return [[url, texts[url]] for url in dict.fromkeys(urls) if url in texts]
+
+
+def process_row(row: int, record: dict, ctx: PipelineContext) -> tuple[dict, dict] | None:
+    """
+    Runs search, sitemap discovery, scraping, structured-data extraction,
+    retrieval and extraction for one company. Searches, URL topics, retrieval
+    questions and prompt fields are limited to what the unfilled fields need
+    (see `planner.plan_row`); complete rows are skipped. Every stage is
+    checkpointed under generated/checkpoints/, and stages whose inputs did not
+    change since the last run are loaded instead of redone.
+
+    Args:
+        row (int): Sheet row of the company.
+        record (dict): The row's current cell values keyed by column letter.
+        ctx (PipelineContext): Clients and stores to use.
+
+    Returns:
+        tuple[dict, dict] | None: Column letter to value for the fields that were
+        unfilled, and column letter to confidence for the values taken from
+        structured data; None if the row is complete, or the model returned no
+        valid JSON and the pages had no structured data.
+    """
+    extracted = tldextract.extract(record['B'])
+    if 'eu' in extracted.registered_domain:
+        base_domain = f'{extracted.subdomain}.{extracted.registered_domain}'
+    else:
+        base_domain = f"{extracted.domain}.{extracted.suffix}"
+
+    # Only the work the unfilled fields need is scheduled
+    plan = plan_row(row, record)
+    if not plan.missing:
+        print(f"Row {row} is complete, skipping")
+        return None
+
+    checkpoint = RowCheckpoint(row)
+    cmp_name = record['A']
+
+    def search():
+        contexts, links, failed = run_searches(cmp_name, base_domain, ctx.search_client, plan.searches)
+        return {"contexts": contexts, "links": sorted(links), "failed": failed}
+
+    # Timed-out or blocked searches, fetches that all failed and unparseable responses are redone next run
+    searches = [search for search in SEARCHES if search[0] in plan.searches]
+    searched = checkpoint.run(
+        "search", {"name": cmp_name, "domain": base_domain, "searches": searches}, search,
+        degraded=lambda out: f"{len(out['failed'])} searches failed" if out.get("failed") else None
+    )
+    industry_context = searched["contexts"]["industry"]  # F
+    employee_context = searched["contexts"]["employee"]  # H
+    parent_cmp_context = searched["contexts"]["parent_cmp"]  # K
+    address_context = searched["contexts"]["address"]
+    ddg_links = {urlparse(link.strip()).path for link in searched["links"] if is_on_site(link, base_domain)}
+
+    urls = checkpoint.run(
+        "select_urls", {"domain": base_domain, "sitemap": record['S'], "ddg_links": sorted(ddg_links),
+                        "questions": plan.questions, "topics": plan.url_topics},
+        lambda: select_urls(record, base_domain, ddg_links, ctx, plan)
+    )
+
+    company_id = f"cmp_{row}"
+    pages = checkpoint.run("scrape", {"urls": urls}, lambda: scrape_pages(urls, ctx),
+                           degraded=lambda out: None if any(text for _, text in out) else "every fetch failed")
+
+    def structured():
+        documents = [(url, cached.html) for url, _ in pages if (cached := ctx.crawl_store.get(url))]
+        found = extract_structured(documents, base_domain)
+        return {field: [value.value, value.confidence, value.source] for field, value in found.items()}
+
+    # Fields stated in JSON-LD, microdata or mailto/tel links skip retrieval and the prompt
+    found = checkpoint.run("structured", {"pages": pages, "domain": base_domain,
+                                            "version": STRUCTURED_VERSION}, structured)
+    resolved = {field for field, (_, confidence, _) in found.items() if confidence >= STRUCTURED_MIN_CONFIDENCE}
+    asked = open_questions(resolved | plan.filled)
+    if resolved:
+        print(f"🧾 Structured data resolved {', '.join(sorted(resolved))}")
+
+    def chunk():
+        cleaned, removed_lines = strip_boilerplate(pages)
+        kept, removed_chunks = dedupe_chunks(list(iter_chunks(cleaned)))
+        print(f"🧹 Removed {removed_lines} boilerplate lines and {removed_chunks} near-duplicate chunks, "
+              f"{len(kept)} chunks left")
+        return {"chunks": [[c.url, c.text] for c in kept],
+                "removed_lines": removed_lines, "removed_chunks": removed_chunks}
+
+    chunked = checkpoint.run("chunk", {"pages": pages, "tokens": CHUNK_TOKENS, "overlap": CHUNK_OVERLAP_TOKENS,
+                                       "version": CHUNKER_VERSION}, chunk)["chunks"]
+    chunks = [text for _, text in chunked]
+
+    def embed():
+        embed_and_store(chunks, company_id, ctx.vector_store, ctx.embedder, ctx.embedding_cache,
+                        sources=[url for url, _ in chunked])
+        return {"company_id": company_id, "chunks": len(chunks)}
+
+    # A row re-scraped to nothing keeps no vectors from an earlier run
+    if not chunks and ctx.vector_store.has_company(company_id):
+        ctx.vector_store.delete(company_id)
+
+    # Small sites are searched lexically and never embedded
+    mode = choose_retrieval_mode(len(chunks))
+    print(f"🔎 Retrieval mode for {len(chunks)} chunks: {mode}")
+    if mode != "lexical" and asked:
+        # The vectors live in the store, so the checkpoint only counts while they are still there
+        if not ctx.vector_store.has_company(company_id):
+            checkpoint.invalidate("embed")
+        checkpoint.run("embed", {"chunks": chunked, "model": ctx.embedder.model}, embed)
+
+    questions = [QUESTIONS[i] for i in asked]
+
+    def retrieve():
+        if not asked:
+            return ""
+        distances = None
+        if mode != "lexical":
+            distances = ctx.vector_store.distances(company_id, ctx.question_vectors[asked])
+        queries = [QUESTION_KEYWORDS[i] for i in asked]
+        return build_context(questions, retrieve_chunks(chunks, mode, distances, queries, k=3))
+
+    context = checkpoint.run(
+        "retrieve", {"chunks": chunks, "model": ctx.embedder.model, "questions": questions, "mode": mode}, retrieve
+    )
 
     # Optional: Write context to a file for inspection
     with open(f"generated/retrieved_chunks_{row}", "w", encoding="utf-8") as f:
         f.write(context)
 
 
+    fields = "\n    ".join(f"{field}: <{kind}>" for field, kind in EXTRACTION_FIELDS
+                         if field in plan.missing and field not in resolved)
     prompt = f"""
     You are a data extraction model. You have to extract the following information from the context provided.
     Generate the answer in JSON format given below, give "null" for the values you don't know, and don't generate any other extra explanations or texts:
 
-    software_classification: <string>
-    is_enterprise_grade: <string>
-    industry: <string>
-    customer_name_list: <list>
-    employee_head_count: <number>
-    investors_list: <list>
-    geography: <string>
-    parent_company: <string>
-    street: <string>
-    postal/zip_code: <string>
-    city: <string>
-    country/region: <string>
-    finance: <string>
-    email: <string>
-    phone_number: <string>
+    {fields}
 
     CONTEXT:
     {industry_context}\n
@@ -373,46 +499,54 @@ for row in range(start, end+1):
     {address_context}\n
     {context}
     """
-    cmp_details = m20l.generate_content(prompt)
-    cmp_details = clean_load_json(cmp_details.text)
-
-    if cmp_details:
-        cond = lambda x: x.value is None or x.value.strip() in ("None", "[]", "Not found")
-
-        if cond(sheet[f'D{row}']):
-            sheet[f'D{row}'].value = cmp_details.get('software_classification', None)
-        if cond(sheet[f'E{row}']):
-            sheet[f'E{row}'].value = cmp_details.get('is_enterprise_grade', None)
-        if cond(sheet[f'F{row}']):
-            sheet[f'F{row}'].value = cmp_details.get('industry', None)
-        if cond(sheet[f'G{row}']):
-            sheet[f'G{row}'].value = str(cmp_details.get('customer_name_list', None))
-        if cond(sheet[f'H{row}']):
-            sheet[f'H{row}'].value = cmp_details.get('employee_head_count', None)
-        if cond(sheet[f'I{row}']):
-            sheet[f'I{row}'].value = str(cmp_details.get('investors_list', None))
-        if cond(sheet[f'J{row}']):
-            sheet[f'J{row}'].value = cmp_details.get('geography', None)
-        if cond(sheet[f'K{row}']):
-            sheet[f'K{row}'].value = cmp_details.get('parent_company', None)
-        if cond(sheet[f'L{row}']):
-            sheet[f'L{row}'].value = cmp_details.get('street', None)
-        if cond(sheet[f'M{row}']):
-            sheet[f'M{row}'].value = cmp_details.get('postal/zip_code', None)
-        if cond(sheet[f'N{row}']):
-            sheet[f'N{row}'].value = cmp_details.get('city', None)
-        if cond(sheet[f'O{row}']):
-            sheet[f'O{row}'].value = cmp_details.get('country/region', None)
-        if cond(sheet[f'P{row}']):
-            sheet[f'P{row}'].value = cmp_details.get('finance', None)
-        if cond(sheet[f'Q{row}']):
-            sheet[f'Q{row}'].value = cmp_details.get('email', None)
-        if cond(sheet[f'R{row}']):
-            sheet[f'R{row}'].value = cmp_details.get('phone_number', None)
-        wb.save("company_list.xlsx")
-    else:
-        print(f"No valid JSON received for row {row}.")
-    print(f'\nRow {row} processed')
-    
-close_browser(playwright, browser)
-    
+    cmp_details = {}
+    if fields:
+        def parses(text: str) -> bool:
+            return clean_load_json(text) is not None
+
+        # Unparseable responses are neither cached nor checkpointed, so the next run asks again
+        response = checkpoint.run(
+            "extract", {"prompt": prompt, "model": EXTRACTION_MODEL},
+            lambda: ctx.llm.generate(prompt, EXTRACTION_MODEL, cache_if=parses),
+            degraded=lambda out: None if parses(out) else "response is not valid JSON"
+        )
+        cmp_details = clean_load_json(response)
+        if not cmp_details:
+            print(f"No valid JSON received for row {row}.")
+            if not found:
+                return None
+
+    # Low-confidence structured values only fill what the model left empty
+    details = {field: value for field, (value, _, _) in found.items()}
+    details.update({field: value for field, value in (cmp_details or {}).items() if not is_unfilled(value)})
+    details.update({field: found[field][0] for field in resolved})
+    updates = field_updates(record, details)
+    confidence = {col: found[field][1] for col, field in FIELD_COLUMNS.items()
+                  if col in updates and field in found and updates[col] == found[field][0]}
+    return updates, confidence
+
+
+def main():
+    start, end = 186, 186
+    # Only rows that still miss an extracted field
+    db = open_results_db()
+    records = db.records(db.rows_missing(start=start, end=end))
+    db.close()
+    log = ResultsLog("main")
+
+    ctx = open_context()
+    try:
+        for done, row in enumerate(records, 1):
+            result = process_row(row, records[row], ctx)
+            if result:
+                log.write(row, *result)
+            print(f'\nRow {row} processed')
+            if done % MATERIALIZE_EVERY == 0:
+                materialize("company_list.xlsx")
+    finally:
+        close_context(ctx)
+        materialize("company_list.xlsx")
+
+
+if __name__ == "__main__":
+    main()
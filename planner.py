@@ -0,0 +1,118 @@
+"""
+Plans the work for each row from the fields it still misses.
+
+    python planner.py --start 2 --end 186 [--missing employee_head_count]
+"""
+import argparse
+from dataclasses import dataclass, field
+
+from columns import FIELD_COLUMNS, is_unfilled
+from retrieval import QUESTIONS, open_questions
+from results_db import WORKBOOK_PATH, open_results_db
+
+ADDRESS = ["street", "postal/zip_code", "city", "country/region"]
+
+# Fields each search of main.SEARCHES gathers snippets for
+SEARCH_FIELDS = {
+    "industry": ["software_classification", "industry"],
+    "employee": ["employee_head_count"],
+    "parent_cmp": ["parent_company"],
+    "address": ADDRESS,
+}
+
+# Fields each url_ranker topic is likely to answer
+TOPIC_FIELDS = {
+    "about": ["software_classification", "is_enterprise_grade", "industry", "geography", "parent_company"],
+    "contact": [*ADDRESS, "geography", "email", "phone_number"],
+    "team": ["employee_head_count"],
+    "investors": ["investors_list", "finance", "parent_company"],
+    "customers": ["customer_name_list", "is_enterprise_grade"],
+    "offering": ["software_classification", "is_enterprise_grade", "industry"],
+}
+
+
+@dataclass
+class RowPlan:
+    row: int
+    missing: list[str] = field(default_factory=list)
+    searches: list[str] = field(default_factory=list)
+    url_topics: list[str] = field(default_factory=list)
+    questions: list[int] = field(default_factory=list)
+    has_sitemap: bool = False
+
+    @property
+    def filled(self) -> set[str]:
+        return set(FIELD_COLUMNS.values()) - set(self.missing)
+
+    def estimated_calls(self) -> dict[str, int]:
+        """
+        Upper bounds on the calls the row can make; caches and the URL ranker often avoid some.
+        """
+        if not self.missing:
+            return {"searches": 0, "url_llm": 0, "extract_llm": 0}
+        return {
+            # The general query of a search only runs when its on-site query found something
+            "searches": 2 * len(self.searches),
+            # Leaf sitemap choice, page choice, and the homepage-links fallback when those find nothing
+            "url_llm": 3 if self.has_sitemap else 1,
+            "extract_llm": 1,
+        }
+
+
+def plan_row(row: int, record: dict) -> RowPlan:
+    """
+    Works out which searches, URL topics and retrieval questions the row's unfilled fields need.
+    """
+    missing = [name for col, name in FIELD_COLUMNS.items() if is_unfilled(record.get(col))]
+    filled = set(FIELD_COLUMNS.values()) - set(missing)
+    sitemap = record.get("S")
+    return RowPlan(
+        row=row,
+        missing=missing,
+        searches=[name for name, fields in SEARCH_FIELDS.items() if set(fields) & set(missing)],
+        url_topics=[topic for topic, fields in TOPIC_FIELDS.items() if set(fields) & set(missing)],
+        questions=open_questions(filled),
+        has_sitemap=bool(sitemap) and str(sitemap).strip() != "None",
+    )
+
+
+def print_plans(plans: list[RowPlan]):
+    """
+    Prints each row's plan and the estimated calls of the whole run.
+    """
+    totals = {}
+    for plan in plans:
+        calls = plan.estimated_calls()
+        for key, value in calls.items():
+            totals[key] = totals.get(key, 0) + value
+        if not plan.missing:
+            print(f"Row {plan.row}: complete, skipped")
+            continue
+        print(f"Row {plan.row}: missing {', '.join(plan.missing)}")
+        print(f"    searches:  {', '.join(plan.searches) or '-'}")
+        print(f"    url topics: {', '.join(plan.url_topics) or '-'}")
+        print(f"    questions: {'; '.join(QUESTIONS[i] for i in plan.questions) or '-'}")
+        print(f"    calls (at most): {calls}")
+    print(f"📋 {len(plans)} rows, at most {totals.get('searches', 0)} searches, "
+          f"{totals.get('url_llm', 0)} URL selection and {totals.get('extract_llm', 0)} extraction LLM calls")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the work planned for rows that still miss fields.")
+    parser.add_argument("--start", type=int)
+    parser.add_argument("--end", type=int)
+    parser.add_argument("--missing", nargs="*", default=[], metavar="FIELD",
+                        help="only rows missing one of these fields (default: any extracted field)")
+    parser.add_argument("--workbook", default=WORKBOOK_PATH)
+    args = parser.parse_args()
+
+    db = open_results_db(args.workbook)
+    try:
+        records = db.records(db.rows_missing(*args.missing, start=args.start, end=args.end))
+    finally:
+        db.close()
+    print_plans([plan_row(row, record) for row, record in records.items() if record["B"]])
+
+
+if __name__ == "__main__":
+    main()
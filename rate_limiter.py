@@ -0,0 +1,195 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from urllib.parse import urlparse
+
+from shared_state import connect_shared, immediate
+
+# Responses that mean "slow down": DuckDuckGo answers 202 with a CAPTCHA page
+THROTTLE_STATUSES = {202, 429, 503}
+
+
+@dataclass
+class HostPolicy:
+    rate: float = 2.0          # requests per second to start with
+    burst: float = 4.0         # bucket capacity
+    min_rate: float = 0.05
+    max_rate: float = 8.0
+    backoff: float = 0.5       # rate multiplier on a throttle signal
+    recovery: float = 1.25     # rate multiplier after `recover_after` healthy responses
+    recover_after: int = 5
+    cooldown: float = 10.0     # first pause after a throttle signal, doubles while they repeat
+
+
+# Search engines get a slow start and a low ceiling
+DEFAULT_POLICIES = {
+    "html.duckduckgo.com": HostPolicy(rate=0.5, burst=1, max_rate=1.0, cooldown=30.0),
+    "duckduckgo.com": HostPolicy(rate=0.5, burst=1, max_rate=1.0, cooldown=30.0),
+    "www.google.com": HostPolicy(rate=0.2, burst=1, max_rate=0.5, cooldown=60.0),
+}
+
+
+class _Bucket:
+    def __init__(self, policy: HostPolicy):
+        self.policy = policy
+        self.rate = policy.rate
+        self.tokens = policy.burst
+        self.updated = time.time()
+        self.blocked_until = 0.0
+        self.healthy = 0
+        self.throttles = 0
+
+
+def retry_with_backoff(call, is_retryable, max_retries: int = 5, base_delay: float = 2.0,
+                       label: str = "Request", on_retry=None):
+    """
+    Returns `call()`, retrying the errors `is_retryable` accepts with exponential backoff and jitter.
+
+    Other errors, and the last retryable one after `max_retries` retries, are raised.
+    `on_retry` is called before each retry, e.g. to count it.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return call()
+        except Exception as e:
+            if attempt == max_retries or not is_retryable(e):
+                raise
+            if on_retry is not None:
+                on_retry()
+            delay = base_delay * 2 ** attempt + random.uniform(0, 1)
+            print(f"⚠️ {label} quota hit, retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc or url
+
+
+class RateLimiter:
+    """
+    Shared per-host token bucket scheduler with adaptive rates.
+
+    Callers `acquire` a slot before each request and `report` the outcome.
+    Throttle signals (202/429/503 or a detected CAPTCHA) cut the host's rate
+    and pause it for a cooldown; runs of healthy responses raise the rate again
+    up to the host's ceiling. Thread-safe; async code uses `reserve` and
+    sleeps on the returned delay itself.
+
+    State is per process unless `share` points it at a SQLite file, which
+    the runner's workers do so a host sees one rate and one cooldown in total.
+    """
+
+    def __init__(self, policies: dict[str, HostPolicy] | None = None, default: HostPolicy | None = None):
+        self.policies = dict(DEFAULT_POLICIES if policies is None else policies)
+        self.default = default or HostPolicy()
+        self.waited = 0.0
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def share(self, path: str):
+        """
+        Keeps bucket state in a SQLite file shared by every process using the same path.
+        """
+        with self._lock:
+            self._conn = connect_shared(path)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS buckets (
+                    host TEXT PRIMARY KEY,
+                    rate REAL NOT NULL,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    blocked_until REAL NOT NULL,
+                    healthy INTEGER NOT NULL,
+                    throttles INTEGER NOT NULL
+                )
+            """)
+
+    def _bucket(self, host: str) -> _Bucket:
+        if host not in self._buckets:
+            self._buckets[host] = _Bucket(self.policies.get(host, self.default))
+        return self._buckets[host]
+
+    @contextmanager
+    def _locked(self, host: str):
+        """
+        Yields the host's bucket for a read-modify-write, loaded from and saved
+        to the shared file when there is one.
+        """
+        with self._lock:
+            bucket = self._bucket(host)
+            if self._conn is None:
+                yield bucket
+                return
+            with immediate(self._conn):
+                row = self._conn.execute(
+                    "SELECT rate, tokens, updated, blocked_until, healthy, throttles FROM buckets WHERE host = ?",
+                    (host,)
+                ).fetchone()
+                if row:
+                    (bucket.rate, bucket.tokens, bucket.updated, bucket.blocked_until,
+                     bucket.healthy, bucket.throttles) = row
+                yield bucket
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (host, bucket.rate, bucket.tokens, bucket.updated, bucket.blocked_until,
+                     bucket.healthy, bucket.throttles)
+                )
+
+    def reserve(self, host: str) -> float:
+        """
+        Takes a token for the host and returns how many seconds to wait before sending.
+        """
+        with self._locked(host) as bucket:
+            now = time.time()
+            bucket.tokens = min(bucket.policy.burst, bucket.tokens + (now - bucket.updated) * bucket.rate)
+            bucket.updated = now
+
+            wait = max(0.0, bucket.blocked_until - now)
+            if bucket.tokens < 1:
+                wait = max(wait, (1 - bucket.tokens) / bucket.rate)
+            bucket.tokens -= 1
+            self.waited += wait
+        return wait
+
+    def acquire(self, host: str):
+        wait = self.reserve(host)
+        if wait > 0:
+            time.sleep(wait)
+
+    def report(self, host: str, status: int | None = None, throttled: bool = False):
+        """
+        Feeds a response back into the host's rate.
+
+        Args:
+            host (str): Host the request went to.
+            status (int | None): HTTP status, if known.
+            throttled (bool): True when a CAPTCHA or block page was detected.
+        """
+        with self._locked(host) as bucket:
+            policy = bucket.policy
+            if throttled or status in THROTTLE_STATUSES:
+                bucket.rate = max(policy.min_rate, bucket.rate * policy.backoff)
+                pause = policy.cooldown * 2 ** min(bucket.throttles, 5)
+                bucket.blocked_until = time.time() + pause
+                bucket.throttles += 1
+                bucket.healthy = 0
+                print(f"⚠️ {host} is throttling us, slowing to {bucket.rate:.2f} req/s and pausing {pause:.0f}s")
+            elif status is None or status < 400:
+                bucket.throttles = 0
+                bucket.healthy += 1
+                if bucket.healthy >= policy.recover_after:
+                    bucket.rate = min(policy.max_rate, bucket.rate * policy.recovery)
+                    bucket.healthy = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "waited_seconds": round(self.waited, 1),
+                "rates": {host: round(bucket.rate, 3) for host, bucket in self._buckets.items()},
+            }
+
+
+limiter = RateLimiter()
@@ -0,0 +1,275 @@
+"""
+Local results database: the system of record for company_list.xlsx.
+
+    python results_db.py import [--workbook company_list.xlsx]
+    python results_db.py export [--workbook company_list.xlsx]
+    python results_db.py missing employee_head_count [--start 2 --end 186]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+import tldextract
+from openpyxl import load_workbook
+
+from columns import ALL_COLUMNS, FIELD_COLUMNS, is_unfilled, read_records
+
+RESULTS_DB_PATH = "company_list.sqlite"
+WORKBOOK_PATH = "company_list.xlsx"
+
+# Columns whose fill status is tracked: the extracted fields plus the sitemap
+TRACKED_COLUMNS = {**FIELD_COLUMNS, "S": "sitemap"}
+COLUMN_OF = {field: col for col, field in TRACKED_COLUMNS.items()}
+
+
+def company_domain(website: str | None) -> str | None:
+    if not website:
+        return None
+    extracted = tldextract.extract(str(website))
+    return extracted.registered_domain or extracted.domain or None
+
+
+class ResultsDB:
+    """
+    SQLite copy of the sheet, indexed by row, domain and per-field fill status.
+
+    `companies` holds the input columns (A–C) and `fields` holds one row per
+    (sheet row, tracked column) with its JSON-encoded value and whether it
+    counts as filled, so "rows missing X" is an index lookup instead of a
+    scan over the sheet. The xlsx layout is kept for import and export.
+    """
+
+    def __init__(self, path: str = RESULTS_DB_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS companies (
+                row INTEGER PRIMARY KEY,
+                name TEXT,
+                website TEXT,
+                domain TEXT,
+                description TEXT,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_companies_domain ON companies (domain);
+            CREATE TABLE IF NOT EXISTS fields (
+                row INTEGER NOT NULL,
+                field TEXT NOT NULL,
+                value TEXT,
+                filled INTEGER NOT NULL,
+                updated_at REAL NOT NULL,
+                confidence REAL,
+                PRIMARY KEY (row, field)
+            );
+            CREATE INDEX IF NOT EXISTS idx_fields_status ON fields (field, filled, row);
+        """)
+        # Databases created before values carried a confidence
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(fields)")]
+        if "confidence" not in columns:
+            self._conn.execute("ALTER TABLE fields ADD COLUMN confidence REAL")
+        self._conn.commit()
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM companies").fetchone()[0]
+
+    def _upsert(self, row: int, updates: dict, confidence: dict, now: float):
+        inputs = {col: updates[col] for col in ("A", "B", "C") if col in updates}
+        if inputs:
+            self._conn.execute("INSERT OR IGNORE INTO companies (row, updated_at) VALUES (?, ?)", (row, now))
+            for col, column in (("A", "name"), ("B", "website"), ("C", "description")):
+                if col in inputs:
+                    self._conn.execute(f"UPDATE companies SET {column} = ?, updated_at = ? WHERE row = ?",
+                                       (inputs[col], now, row))
+            if "B" in inputs:
+                self._conn.execute("UPDATE companies SET domain = ? WHERE row = ?",
+                                   (company_domain(inputs["B"]), row))
+
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO fields (row, field, value, filled, updated_at, confidence) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(row, field, json.dumps(updates[col], ensure_ascii=False), int(not is_unfilled(updates[col])), now,
+              confidence.get(col)) for col, field in TRACKED_COLUMNS.items() if col in updates]
+        )
+
+    def update(self, results: dict[int, dict], confidence: dict[int, dict] | None = None):
+        """
+        Writes cell values in the sheet layout.
+
+        Args:
+            results (dict[int, dict]): Row number to {column letter: value}.
+            confidence (dict[int, dict] | None): Row number to {column letter: confidence}
+                for values that were extracted deterministically; other values get none.
+        """
+        now = time.time()
+        confidence = confidence or {}
+        with self._conn:
+            for row, updates in results.items():
+                self._upsert(row, updates, confidence.get(row, {}), now)
+
+    def import_xlsx(self, workbook_path: str = WORKBOOK_PATH, sheet_name: str = "Sheet1") -> int:
+        """
+        Loads every company row of the workbook (streaming, read-only), replacing stored values.
+
+        Returns:
+            int: Number of rows imported.
+        """
+        wb = load_workbook(workbook_path, read_only=True)
+        try:
+            sheet = wb[sheet_name]
+            records = read_records(sheet, 2, sheet.max_row)
+        finally:
+            wb.close()
+        records = {row: record for row, record in records.items() if record["A"] or record["B"]}
+        # Every tracked column gets a status row, so missing-field queries see unfilled cells too
+        self.update(records)
+        return len(records)
+
+    def export_xlsx(self, workbook_path: str = WORKBOOK_PATH, sheet_name: str = "Sheet1") -> int:
+        """
+        Writes all stored rows into the workbook's A–S columns and saves it once,
+        through a temporary file so a crash never corrupts it.
+
+        Returns:
+            int: Number of rows written.
+        """
+        records = self.records(self.rows())
+        wb = load_workbook(workbook_path)
+        sheet = wb[sheet_name]
+        for row, record in records.items():
+            for col in ALL_COLUMNS:
+                sheet[f"{col}{row}"].value = record[col]
+        tmp_path = workbook_path + ".tmp"
+        wb.save(tmp_path)
+        os.replace(tmp_path, workbook_path)
+        return len(records)
+
+    def rows(self, start: int | None = None, end: int | None = None) -> list[int]:
+        return [row for (row,) in self._conn.execute(
+            "SELECT row FROM companies WHERE row BETWEEN ? AND ? ORDER BY row",
+            (start if start is not None else 0, end if end is not None else 2 ** 62)
+        )]
+
+    def rows_missing(self, *fields: str, start: int | None = None, end: int | None = None,
+                     limit: int | None = None) -> list[int]:
+        """
+        Rows where any of the given fields is unfilled.
+
+        Args:
+            fields (str): Field names, e.g. "employee_head_count" or "sitemap".
+                Defaults to every extracted field.
+            start, end (int | None): Optional row range (inclusive).
+            limit (int | None): Return at most this many rows.
+
+        Returns:
+            list[int]: Row numbers in ascending order.
+        """
+        fields = fields or tuple(FIELD_COLUMNS.values())
+        unknown = [field for field in fields if field not in COLUMN_OF]
+        if unknown:
+            raise ValueError(f"Unknown fields: {unknown}")
+        query = (f"SELECT DISTINCT row FROM fields WHERE field IN ({','.join('?' * len(fields))}) "
+                 "AND filled = 0 AND row BETWEEN ? AND ? ORDER BY row")
+        params = [*fields, start if start is not None else 0, end if end is not None else 2 ** 62]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [row for (row,) in self._conn.execute(query, params)]
+
+    def rows_for_domain(self, domain: str) -> list[int]:
+        return [row for (row,) in self._conn.execute(
+            "SELECT row FROM companies WHERE domain = ? ORDER BY row", (domain,)
+        )]
+
+    def records(self, rows: list[int]) -> dict[int, dict]:
+        """
+        Returns the rows in the sheet layout, like `columns.read_records`.
+
+        Returns:
+            dict[int, dict]: Row number to {column letter: value} for A–S.
+        """
+        records = {}
+        for i in range(0, len(rows), 500):
+            part = rows[i:i + 500]
+            marks = ",".join("?" * len(part))
+            for row, name, website, description in self._conn.execute(
+                f"SELECT row, name, website, description FROM companies WHERE row IN ({marks})", part
+            ):
+                records[row] = dict.fromkeys(ALL_COLUMNS)
+                records[row].update({"A": name, "B": website, "C": description})
+            for row, field, value in self._conn.execute(
+                f"SELECT row, field, value FROM fields WHERE row IN ({marks})", part
+            ):
+                if row in records:
+                    records[row][COLUMN_OF[field]] = json.loads(value)
+        return {row: records[row] for row in rows if row in records}
+
+    def confidences(self, rows: list[int]) -> dict[int, dict]:
+        """
+        Returns:
+            dict[int, dict]: Row number to {column letter: confidence} for the values that have one.
+        """
+        found = {}
+        for i in range(0, len(rows), 500):
+            part = rows[i:i + 500]
+            for row, field, confidence in self._conn.execute(
+                f"SELECT row, field, confidence FROM fields WHERE row IN ({','.join('?' * len(part))}) "
+                "AND confidence IS NOT NULL", part
+            ):
+                found.setdefault(row, {})[COLUMN_OF[field]] = confidence
+        return found
+
+    def fill_stats(self) -> dict[str, int]:
+        """
+        Number of unfilled rows per field.
+        """
+        return dict(self._conn.execute(
+            "SELECT field, SUM(filled = 0) FROM fields GROUP BY field ORDER BY field"
+        ).fetchall())
+
+    def close(self):
+        self._conn.close()
+
+
+def open_results_db(workbook_path: str = WORKBOOK_PATH, path: str = RESULTS_DB_PATH) -> ResultsDB:
+    """
+    Opens the results database, importing the workbook the first time.
+    """
+    db = ResultsDB(path)
+    if db.count() == 0 and os.path.exists(workbook_path):
+        print(f"📥 Imported {db.import_xlsx(workbook_path)} rows from {workbook_path} into {path}")
+    return db
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import, export and query the local results database.")
+    parser.add_argument("command", choices=["import", "export", "missing", "stats"])
+    parser.add_argument("fields", nargs="*", help="fields for `missing`, e.g. employee_head_count")
+    parser.add_argument("--workbook", default=WORKBOOK_PATH)
+    parser.add_argument("--db", default=RESULTS_DB_PATH)
+    parser.add_argument("--start", type=int)
+    parser.add_argument("--end", type=int)
+    parser.add_argument("--limit", type=int)
+    args = parser.parse_args()
+
+    db = ResultsDB(args.db)
+    try:
+        if args.command == "import":
+            print(f"Imported {db.import_xlsx(args.workbook)} rows from {args.workbook}")
+        elif args.command == "export":
+            print(f"Exported {db.export_xlsx(args.workbook)} rows to {args.workbook}")
+        elif args.command == "missing":
+            rows = db.rows_missing(*args.fields, start=args.start, end=args.end, limit=args.limit)
+            print("\n".join(map(str, rows)))
+        else:
+            for field, missing in db.fill_stats().items():
+                print(f"{field:<26}{missing:>6} missing")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
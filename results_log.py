@@ -0,0 +1,109 @@
+import glob
+import json
+import os
+import time
+
+from results_db import RESULTS_DB_PATH, open_results_db
+
+RESULTS_DIR = "runs"
+
+# Scripts write the log into the workbook every this many rows, and once at the end
+MATERIALIZE_EVERY = 25
+
+
+class ResultsLog:
+    """
+    Append-only JSONL log of results, one record per (row, column).
+
+    Each writer (a script or a runner worker) owns its own
+    `results_<name>.jsonl` file, so writers never share a file. Records are
+    fsynced as they are written and the workbook is only touched by
+    `materialize`.
+    """
+
+    def __init__(self, name: str, directory: str = RESULTS_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"results_{name}.jsonl")
+
+    def write(self, row: int, updates: dict, confidence: dict | None = None):
+        """
+        Appends one record per column in `updates`.
+
+        Args:
+            row (int): Sheet row.
+            updates (dict): Column letter to cell value.
+            confidence (dict | None): Column letter to confidence, for deterministically extracted values.
+        """
+        if not updates:
+            return
+        now = time.time()
+        confidence = confidence or {}
+        lines = "".join(
+            json.dumps({"row": row, "col": col, "value": value, "at": now,
+                        **({"confidence": confidence[col]} if col in confidence else {})}, ensure_ascii=False) + "\n"
+            for col, value in updates.items()
+        )
+        # Opened per write so `materialize` can move the file away between writes
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def read_results(paths: list[str]) -> tuple[dict[int, dict], dict[int, dict]]:
+    """
+    Folds log files into the latest value per cell. Later records win.
+
+    Returns:
+        tuple[dict[int, dict], dict[int, dict]]: Row number to {column letter: value},
+        and row number to {column letter: confidence} for the latest values that have one.
+    """
+    results = {}
+    confidence = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A writer killed mid-write can leave a partial last line
+                    continue
+                results.setdefault(record["row"], {})[record["col"]] = record["value"]
+                confidence.setdefault(record["row"], {}).pop(record["col"], None)
+                if record.get("confidence") is not None:
+                    confidence[record["row"]][record["col"]] = record["confidence"]
+    return results, confidence
+
+
+def materialize(workbook_path: str, directory: str = RESULTS_DIR, db_path: str = RESULTS_DB_PATH) -> int:
+    """
+    Applies every results log in `directory` to the results database, then
+    exports it to the workbook in one pass and saves it once.
+
+    The workbook is written to a temporary file and swapped in, so a crash
+    during the save never corrupts it. Applied logs are moved to `merged/`
+    so they are not applied again. Call it from the process that owns the
+    logs, between writes, or after all workers have exited.
+
+    Returns:
+        int: Number of rows written.
+    """
+    paths = sorted(glob.glob(os.path.join(directory, "results_*.jsonl")))
+    results, confidence = read_results(paths)
+    if not results:
+        return 0
+
+    db = open_results_db(workbook_path, db_path)
+    try:
+        db.update(results, confidence)
+        db.export_xlsx(workbook_path)
+    finally:
+        db.close()
+
+    os.makedirs(os.path.join(directory, "merged"), exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S") + f"-{time.time_ns() // 1_000_000 % 1000:03d}"
+    for path in paths:
+        name = os.path.basename(path).replace(".jsonl", f".{stamp}.jsonl")
+        os.replace(path, os.path.join(directory, "merged", name))
+    print(f"✅ Wrote {len(results)} rows into {workbook_path}")
+    return len(results)
@@ -0,0 +1,156 @@
+import json
+import os
+
+import numpy as np
+
+from embedder import EmbeddingBackend, embed_texts
+from lexical_index import LexicalIndex
+
+QUESTIONS = [
+    "Software classification of company",
+    "Is the company 'enterprise grade' or 'SMB'",
+    "Industry of company",
+    "Customer/client name list",
+    "Employee or staff head count",
+    "Investors list",
+    "Geography",
+    "Parent company",
+    "Full address or location of company",
+    "Finance details",
+    "Email of company",
+    "Phone number of company"
+]
+
+# Keyword form of each question for the lexical index, in the same order as QUESTIONS
+QUESTION_KEYWORDS = [
+    "software platform saas application cloud product solution",
+    "enterprise enterprises smb small medium business businesses customers",
+    "industry sector market industries",
+    "customers clients customer client trusted case study studies partners",
+    "employees employee staff team people headcount size",
+    "investors investor funding funded backed raised capital ventures series",
+    "offices locations countries global worldwide regions headquarters",
+    "parent company subsidiary group owned acquired part",
+    "address street road avenue suite floor headquarters office located postcode",
+    "revenue turnover funding profit financial finance million billion",
+    "email mail contact enquiries info",
+    "phone telephone tel call contact number",
+]
+
+# Extraction fields each question gathers context for, in the same order as QUESTIONS
+QUESTION_FIELDS = [
+    ["software_classification"],
+    ["is_enterprise_grade"],
+    ["industry"],
+    ["customer_name_list"],
+    ["employee_head_count"],
+    ["investors_list"],
+    ["geography"],
+    ["parent_company"],
+    ["street", "postal/zip_code", "city", "country/region"],
+    ["finance"],
+    ["email"],
+    ["phone_number"],
+]
+
+QUESTION_EMBEDDINGS_PATH = "embeddings/questions.npz"
+
+# Companies with at most this many chunks are retrieved lexically, without embeddings
+LEXICAL_MAX_CHUNKS = 40
+# and from this many on by vectors only; sizes in between fuse both scores
+DENSE_MIN_CHUNKS = 2000
+HYBRID_ALPHA = 0.5
+
+
+def load_question_embeddings(backend: EmbeddingBackend, questions: list[str] = QUESTIONS,
+                             path: str = QUESTION_EMBEDDINGS_PATH, cache=None) -> np.ndarray:
+    """
+    Returns the query embeddings for the questions, computing them only once.
+
+    The vectors are saved together with the model name and the question texts,
+    and are recomputed only when either of those changes.
+
+    Args:
+        backend (EmbeddingBackend): Backend used if the vectors need computing.
+        questions (list[str]): Question texts.
+        path (str): .npz file holding the stored vectors.
+        cache (EmbeddingCache | None): Optional embedding cache.
+
+    Returns:
+        np.ndarray: float32 array of shape (len(questions), dim).
+    """
+    if os.path.exists(path):
+        stored = np.load(path)
+        if str(stored["model"]) == backend.model and json.loads(str(stored["questions"])) == questions:
+            return stored["vectors"].astype("float32")
+
+    vectors = embed_texts(questions, backend, task_type="retrieval_query", cache=cache)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.savez(path, model=backend.model, questions=json.dumps(questions), vectors=vectors)
+    return vectors
+
+
+def open_questions(resolved: set[str]) -> list[int]:
+    """
+    Indices of the questions that still gather context for at least one unresolved field.
+    """
+    return [i for i, fields in enumerate(QUESTION_FIELDS) if not set(fields) <= resolved]
+
+
+def build_context(questions: list[str], retrieved: list[list[str]]) -> str:
+    """
+    Formats the retrieved chunks per question into the context passed to the extraction prompt.
+    """
+    context = ""
+    for question, chunks in zip(questions, retrieved):
+        retrieved_chunks = "\n\n".join(chunks)
+        context += f"\n\n=== context for: {question} ===\n\n{retrieved_chunks}"
+    return context
+
+
+def choose_retrieval_mode(chunk_count: int) -> str:
+    """
+    Returns "lexical", "hybrid" or "dense" for a company's number of chunks.
+    """
+    if chunk_count <= LEXICAL_MAX_CHUNKS:
+        return "lexical"
+    if chunk_count >= DENSE_MIN_CHUNKS:
+        return "dense"
+    return "hybrid"
+
+
+def _normalize(scores: np.ndarray) -> np.ndarray:
+    low, high = scores.min(), scores.max()
+    return (scores - low) / (high - low) if high > low else np.zeros_like(scores)
+
+
+def retrieve_chunks(chunks: list[str], mode: str, distances: np.ndarray | None = None,
+                    queries: list[str] = QUESTION_KEYWORDS, k: int = 3, alpha: float = HYBRID_ALPHA) -> list[list[str]]:
+    """
+    Picks the top-k chunks per question.
+
+    Args:
+        chunks (list[str]): The company's chunks, in store position order.
+        mode (str): "lexical" ranks by BM25 only; "dense" by vector distance only;
+            "hybrid" by `alpha` * dense + (1 - alpha) * BM25 similarity, each min-max
+            normalized per question.
+        distances (np.ndarray | None): Squared L2 distances of shape (questions, chunks),
+            from `VectorStore.distances`; required unless the mode is "lexical".
+        queries (list[str]): Lexical form of each question.
+
+    Returns:
+        list[list[str]]: Chunk texts per question, best first.
+    """
+    if mode != "lexical" and distances is None:
+        raise ValueError(f"Retrieval mode {mode!r} needs chunk distances")
+    if mode == "lexical":
+        return [[chunks[i] for i in best] for best in LexicalIndex(chunks).search(queries, k)]
+
+    index = LexicalIndex(chunks) if mode == "hybrid" else None
+    retrieved = []
+    for q, row in enumerate(distances):
+        scores = _normalize(-row)
+        if index is not None:
+            scores = alpha * scores + (1 - alpha) * _normalize(index.scores(queries[q]))
+        retrieved.append([chunks[i] for i in np.argsort(-scores, kind="stable")[:k]])
+    return retrieved
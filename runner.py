@@ -0,0 +1,166 @@
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import time
+import traceback
+
+from planner import plan_row, print_plans
+from rate_limiter import limiter
+from results_db import open_results_db
+from results_log import RESULTS_DIR, ResultsLog, materialize
+
+COORDINATOR_PATH = os.path.join(RESULTS_DIR, "coordinator.sqlite")
+# Per-host request rates and per-model LLM quotas shared by all workers
+LIMITER_PATH = os.path.join(RESULTS_DIR, "rate_limiter.sqlite")
+LLM_QUOTA_PATH = os.path.join(RESULTS_DIR, "llm_quota.sqlite")
+
+
+class Coordinator:
+    """
+    Tracks which rows are pending, in progress, done or failed.
+
+    State lives in SQLite so every worker process can claim rows and report
+    back through its own connection. The table only ever holds the current
+    run's rows; `plan` replaces it at the start of each run.
+    """
+
+    def __init__(self, path: str = COORDINATOR_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS rows (
+                row INTEGER PRIMARY KEY,
+                shard INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker INTEGER,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated_at REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_shard_status ON rows (shard, status)")
+
+    def plan(self, rows: list[int], shards: int):
+        """
+        Replaces the tracked rows with `rows`, all pending, round-robin across shards.
+
+        Rows of earlier runs are dropped whatever their status, so `claim`
+        only hands out rows of this run and a selected row is always processed.
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._conn.execute("DELETE FROM rows")
+        self._conn.executemany("INSERT INTO rows (row, shard) VALUES (?, ?)",
+                               [(row, i % shards) for i, row in enumerate(rows)])
+        self._conn.execute("COMMIT")
+
+    def claim(self, shard: int, worker: int) -> int | None:
+        """
+        Atomically marks the next pending row of the shard as in progress and returns it.
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        found = self._conn.execute(
+            "SELECT row FROM rows WHERE shard = ? AND status = 'pending' ORDER BY row LIMIT 1", (shard,)
+        ).fetchone()
+        if found:
+            self._conn.execute(
+                "UPDATE rows SET status = 'in_progress', worker = ?, attempts = attempts + 1, updated_at = ? "
+                "WHERE row = ?",
+                (worker, time.time(), found[0])
+            )
+        self._conn.execute("COMMIT")
+        return found[0] if found else None
+
+    def finish(self, row: int, error: str | None = None):
+        self._conn.execute(
+            "UPDATE rows SET status = ?, error = ?, updated_at = ? WHERE row = ?",
+            ("failed" if error else "done", error, time.time(), row)
+        )
+
+    def summary(self) -> dict:
+        return dict(self._conn.execute("SELECT status, COUNT(*) FROM rows GROUP BY status").fetchall())
+
+    def failed(self) -> list[tuple[int, str]]:
+        return self._conn.execute("SELECT row, error FROM rows WHERE status = 'failed' ORDER BY row").fetchall()
+
+    def close(self):
+        self._conn.close()
+
+
+def run_worker(worker: int, shards: int, records: dict, render_profile: str):
+    """
+    Worker process: opens its own browser and model clients, then processes
+    the rows of its shard until none are pending.
+    """
+    from main import open_context, close_context, process_row
+
+    coordinator = Coordinator()
+    log = ResultsLog(str(worker))
+    limiter.share(LIMITER_PATH)
+    ctx = open_context(render_profile)
+    ctx.llm.share(LLM_QUOTA_PATH)
+    try:
+        while (row := coordinator.claim(worker % shards, worker)) is not None:
+            try:
+                result = process_row(row, records[row], ctx)
+                if result:
+                    log.write(row, *result)
+                coordinator.finish(row)
+                print(f"[worker {worker}] Row {row} processed")
+            except Exception:
+                coordinator.finish(row, traceback.format_exc(limit=5))
+                print(f"[worker {worker}] ❌ Row {row} failed")
+    finally:
+        close_context(ctx)
+        coordinator.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process a range of workbook rows with several worker processes.")
+    parser.add_argument("--start", type=int, required=True, help="first sheet row")
+    parser.add_argument("--end", type=int, required=True, help="last sheet row (inclusive)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--workbook", default="company_list.xlsx")
+    parser.add_argument("--render-profile", default="fast", choices=["fast", "interactive"],
+                        help="browser rendering profile, see scraper.PROFILES")
+    parser.add_argument("--missing", nargs="*", default=[], metavar="FIELD",
+                        help="only rows missing one of these fields (default: any extracted field)")
+    parser.add_argument("--dry-run", action="store_true", help="print each row's plan and estimated calls, then exit")
+    args = parser.parse_args()
+
+    # Results a crashed run logged but never merged count before rows are selected
+    materialize(args.workbook)
+    db = open_results_db(args.workbook)
+    selected = db.records(db.rows_missing(*args.missing, start=args.start, end=args.end))
+    db.close()
+    records = {row: record for row, record in selected.items() if record["B"]}
+    rows = list(records)
+    if args.dry_run:
+        print_plans([plan_row(row, record) for row, record in records.items()])
+        return
+
+    coordinator = Coordinator()
+    coordinator.plan(rows, args.workers)
+
+    ctx = multiprocessing.get_context("spawn")
+    workers = [
+        ctx.Process(target=run_worker, args=(i, args.workers, records, args.render_profile))
+        for i in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    written = materialize(args.workbook)
+    print(f"Merged {written} rows into {args.workbook}")
+    print(f"Row status: {coordinator.summary()}")
+    for row, error in coordinator.failed():
+        print(f"  row {row} failed: {error.strip().splitlines()[-1]}")
+    coordinator.close()
+
+
+if __name__ == "__main__":
+    main()
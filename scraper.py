@@ -1,9 +1,9 @@
 from asyncio import timeout
-from bs4 import BeautifulSoup
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 import random
-import time
-from urllib.parse import urlparse, urljoin
+from dataclasses import dataclass
+from extraction import extract_page, extract_text
+from rate_limiter import host_of, limiter
 
 # Fingerprint profiles with user agent, platform, and viewport
 fingerprints = [
@@ -24,18 +24,77 @@ fingerprints = [
     }
 ]
 
-def create_browser():
+DDG_HOST = "html.duckduckgo.com"
+
+# Analytics, ads and chat widgets that never carry company information
+BLOCKED_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "googleadservices.com", "facebook.net", "connect.facebook.net", "hotjar.com", "clarity.ms",
+    "segment.com", "segment.io", "mixpanel.com", "hubspot.com", "hs-analytics.net", "hs-scripts.com",
+    "linkedin.com/px", "snap.licdn.com", "ads-twitter.com", "intercom.io", "intercomcdn.com",
+    "drift.com", "cookielaw.org", "onetrust.com", "cookiebot.com", "newrelic.com", "nr-data.net",
+)
+
+@dataclass(frozen=True)
+class RenderProfile:
+    """
+    How pages are rendered: browser mode, which requests are blocked and
+    when a page counts as ready.
+
+    wait_until is passed to page.goto ("load", "domcontentloaded", "networkidle"),
+    then the page gets `settle_ms` more to run its scripts.
+    """
+    headless: bool = True
+    slow_mo: int = 0
+    blocked_resource_types: frozenset = frozenset({"image", "media", "font", "stylesheet", "manifest"})
+    blocked_hosts: tuple = BLOCKED_HOSTS
+    wait_until: str = "domcontentloaded"
+    settle_ms: int = 500
+    timeout_ms: int = 20000
+
+PROFILES = {
+    # Headless, text-only rendering for scraping
+    "fast": RenderProfile(),
+    # Visible browser with everything loaded, e.g. to solve a CAPTCHA by hand
+    "interactive": RenderProfile(headless=False, slow_mo=10, blocked_resource_types=frozenset(),
+                                 blocked_hosts=(), wait_until="networkidle", settle_ms=0),
+}
+
+def should_block(profile: RenderProfile, resource_type: str, url: str) -> bool:
+    if resource_type in profile.blocked_resource_types:
+        return True
+    host_and_path = url.split("://", 1)[-1]
+    return any(blocked in host_and_path.split("?", 1)[0] for blocked in profile.blocked_hosts)
+
+def stealth_scripts(fingerprint: dict) -> list[str]:
+    """
+    Init scripts that spoof navigator.platform and hide the WebDriver property.
+    """
+    return [
+        f"""
+        Object.defineProperty(navigator, 'platform', {{
+            get: () => '{fingerprint["platform"]}'
+        }});
+    """,
+        "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});",
+    ]
+
+def create_browser(profile: RenderProfile = PROFILES["fast"]):
     playwright = sync_playwright().start()
 
     fingerprint = random.choice(fingerprints)
 
-    browser = playwright.chromium.launch(headless=False, slow_mo=10)
+    browser = playwright.chromium.launch(headless=profile.headless, slow_mo=profile.slow_mo)
     context = browser.new_context(
         user_agent=fingerprint["user_agent"],
         viewport={"width": 1920, "height": 1080},
         locale="en-GB",
         timezone_id="Europe/London"
     )
+    if profile.blocked_resource_types or profile.blocked_hosts:
+        context.route("**/*", lambda route: route.abort()
+                      if should_block(profile, route.request.resource_type, route.request.url)
+                      else route.continue_())
     page = context.new_page()
 
     # Set user-agent header explicitly (optional, context already sets it)
@@ -43,15 +102,8 @@ def create_browser():
         "User-Agent": fingerprint["user_agent"]
     })
 
-    # Spoof navigator.platform
-    page.add_init_script(f"""
-        Object.defineProperty(navigator, 'platform', {{
-            get: () => '{fingerprint["platform"]}'
-        }});
-    """)
-
-    # Hide WebDriver property
-    page.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined});")
+    for script in stealth_scripts(fingerprint):
+        page.add_init_script(script)
 
     return playwright, browser, page
 
@@ -59,27 +111,20 @@ def close_browser(playwright, browser):
     browser.close()
     playwright.stop()
 
-def scrape_text(page, url: str) -> str:
+def scrape_text(page, url: str, profile: RenderProfile = PROFILES["fast"]) -> str:
     from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 
     visible_text = ""
 
     try:
-        page.goto(url, timeout=20000, wait_until="networkidle")
-        # page.wait_for_timeout(random.uniform(1, 2.5))  
+        limiter.acquire(host_of(url))
+        response = page.goto(url, timeout=profile.timeout_ms, wait_until=profile.wait_until)
+        limiter.report(host_of(url), response.status if response else None)
         page.wait_for_selector("body", timeout=15000)  # Wait for content
+        if profile.settle_ms:
+            page.wait_for_timeout(profile.settle_ms)
 
-        html = page.content()
-        soup = BeautifulSoup(html, "html.parser")
-
-        for tag in soup(["script", "style", "noscript", "svg", "meta", "head"]):
-            tag.decompose()
-
-        for hidden in soup.select("[style*='display:none'], [style*='visibility:hidden']"):
-            hidden.decompose()
-
-        text = soup.get_text(separator="\n", strip=True)
-        visible_text = "\n".join([line.strip() for line in text.splitlines() if line.strip()])
+        visible_text = extract_text(page.content())
 
         if not visible_text:
             print(f"⚠️ No visible text found at: {url}")
@@ -129,51 +174,6 @@ def google_results(query, page) -> str:
     except Exception as e:
         return f"❌ An error occurred: {str(e)}"
     
-def ddg_results2(query, page):
-    captcha_detected = False
-
-    # Function to handle responses and check for CAPTCHA
-    def check_for_captcha(response):
-        nonlocal captcha_detected
-        if response.status == 202:
-            print("⚠️ CAPTCHA detected. Please solve it manually.")
-            captcha_detected = True
-
-    # Listen to all responses
-    page.on("response", check_for_captcha)
-
-    # Navigate to DuckDuckGo search page
-    page.goto("https://html.duckduckgo.com/html/?kl=uk-en", timeout=10000)
-
-    # If CAPTCHA was detected, wait for manual solving
-    if captcha_detected:
-        input("⏸️ CAPTCHA detected. Solve it and press ENTER to continue...")
-
-    # Proceed with search
-    page.fill("input[name='q']", query)
-    page.wait_for_timeout(500)
-    page.click("input[type='submit']")
-
-    # Wait for search results
-    try:
-        if page.query_selector_all('.no-results'):
-            return None
-        page.wait_for_selector(".result__snippet", timeout=10000)
-    except PlaywrightTimeoutError:
-        print("❌ Timeout waiting for results.")
-        return None
-
-    # Extract results while skipping ads
-    text_results = page.query_selector_all(".result:not(.result--ad) .result__snippet")
-    text_results = '; '.join([r.inner_text().strip() for r in text_results[:2]])
-
-    links = page.query_selector_all("a.result__a")
-    links = [link.get_attribute("href") for link in links[:2]]
-    page.wait_for_timeout(700)
-
-    return set(links), text_results
-
-
 def ddg_results(query, page):
     captcha_detected = False
 
@@ -188,15 +188,17 @@ def ddg_results(query, page):
     page.on("response", check_for_captcha)
 
     # Navigate to DuckDuckGo search page
+    limiter.acquire(DDG_HOST)
     page.goto("https://html.duckduckgo.com/html/?kl=uk-en", timeout=10000)
 
     # If CAPTCHA was detected, wait for manual solving
     if captcha_detected:
+        limiter.report(DDG_HOST, throttled=True)
         input("⏸️ CAPTCHA detected. Solve it and press ENTER to continue...")
 
     # Proceed with search
     page.fill("input[name='q']", query)
-    time.sleep(0.5)
+    limiter.acquire(DDG_HOST)
     page.click("input[type='submit']")
 
     # Wait for search results
@@ -206,49 +208,46 @@ def ddg_results(query, page):
         page.wait_for_selector(".result__snippet", timeout=10000)
     except PlaywrightTimeoutError:
         print("❌ Timeout waiting for results.")
+        limiter.report(DDG_HOST, throttled=True)
         return "❌ Timeout err"
+    finally:
+        page.remove_listener("response", check_for_captcha)
 
     # Extract results while skipping ads
     results = page.query_selector_all(".result:not(.result--ad) .result__snippet")
     snippet_texts = '; '.join([r.inner_text().strip() for r in results[:2]])
-    time.sleep(0.5)
+    limiter.report(DDG_HOST, throttled=captcha_detected)
     return snippet_texts
 
-def scrape_internal_links(page, url: str):
+def scrape_internal_links(page, url: str, profile: RenderProfile = PROFILES["fast"], store=None):
     """
     Navigates to the page and extracts all internal links (as relative paths) from <a> tags.
     Returns a list of relative internal paths (e.g., /about, /careers).
+    With a `crawl_store.CrawlStore`, a fresh stored copy of the page is used instead of loading it.
     """
+    if store is not None:
+        cached = store.get(url)
+        if cached and cached.html and store.is_fresh(cached):
+            return extract_page(cached.html, url).links
+
     internal_links = []
 
     try:
         # Navigate to the URL
-        page.goto(url, timeout=20000, wait_until="networkidle")
+        limiter.acquire(host_of(url))
+        response = page.goto(url, timeout=profile.timeout_ms, wait_until=profile.wait_until)
+        limiter.report(host_of(url), response.status if response else None)
+        if profile.settle_ms:
+            page.wait_for_timeout(profile.settle_ms)
         html = page.content()
-        soup = BeautifulSoup(html, "html.parser")
-
-        base_domain = urlparse(url).netloc
-
-        for a_tag in soup.find_all("a", href=True):
-            href = a_tag["href"].strip()
-
-            # Skip anchors, javascript, or mailto links
-            if href.startswith("#") or href.lower().startswith(("javascript:", "mailto:", "tel:")):
-                continue
-
-            # Resolve full URL and check if it's internal
-            full_url = urljoin(url, href)
-            parsed_url = urlparse(full_url)
-
-            if parsed_url.netloc == base_domain:
-                path = parsed_url.path
-                if path and path != "/":
-                    internal_links.append(path)
+        internal_links = extract_page(html, url).links
+        if store is not None:
+            store.put(url, html, extract_text(html), rendered=True)
 
     except Exception as e:
         print(f"⚠️ Error scraping internal links from {url}: {e}")
 
-    return list(set(internal_links))  # remove duplicates
+    return internal_links
 
 # def get_all_text_from_url(url: str) -> str:
 #     """
@@ -1,9 +1,11 @@
 import os
 from dotenv import load_dotenv
 import google.generativeai as genai
-from openpyxl import load_workbook
 import utils
+from columns import load_records
+from results_log import MATERIALIZE_EVERY, ResultsLog, materialize
 import scraper
+from llm_gateway import EXTRACTION_MODEL, GeminiGenerationBackend, LLMGateway, ResponseCache
 import tldextract
 
 load_dotenv()
@@ -12,20 +14,21 @@ if not api_key:
     raise ValueError("GEMINI_API_KEY not found in .env")
 
 genai.configure(api_key=api_key)
-model = genai.GenerativeModel(model_name="models/gemini-2.0-flash-lite")
-# model = genai.GenerativeModel(model_name="models/gemini-1.5-pro")
-chat = model.start_chat()
-
-wb = load_workbook("company_list.xlsx")
-sheet = wb["Sheet1"]
+llm = LLMGateway(GeminiGenerationBackend(), ResponseCache())
+# Sent with every question instead of keeping a chat session
+answer_briefly = 'For the following prompts just answer to the point, if answer not found give "Not found"\n'
 
 start, end = 162, 185
-company_websites = [str(cell.value).strip() for cell in sheet['B'] if cell.value][start-1: end]
-company_names = [str(cell.value).strip() for cell in sheet['A'] if cell.value][start-1: end]
+records = load_records("company_list.xlsx", start, end)
+company_websites = [str(record['B']).strip() for record in records.values() if record['B']]
+company_names = [str(record['A']).strip() for record in records.values() if record['A']]
+log = ResultsLog("search")
 
-playwright, browser, page = scraper.create_browser()
+# ddg_results waits for a CAPTCHA to be solved by hand, which needs a visible browser window
+playwright, browser, page = scraper.create_browser(scraper.PROFILES[os.getenv("RENDER_PROFILE", "interactive")])
 
 for name, site in zip(company_names, company_websites):
+    updates = {}
     extracted = tldextract.extract(site)
     if 'eu' in extracted.registered_domain:
         base_domain = f'{extracted.subdomain}.{extracted.registered_domain}'
@@ -38,10 +41,9 @@ for name, site in zip(company_names, company_websites):
 # give a brief description from the following context:
 # {description_context}
 # """
-#     description = model.generate_content(prompt)
-#     sheet[f'C{start}'] = description.text
+#     description = llm.generate(prompt)
+#     updates['C'] = description.text
     
-    res = chat.send_message('For the following prompts just answer to the point, if answer not found give "Not found"')
 
     query = f'industry site:{base_domain}' # F
     query2 = f'{name} industry'
@@ -51,9 +53,7 @@ for name, site in zip(company_names, company_websites):
 In which industry or sector does company "{name}" in, from following context:
 {industry_context}
 """
-    industry = chat.send_message(prompt)
-    chat.history.pop();chat.history.pop()
-    sheet[f'F{start}'] = industry.text
+    updates['F'] = llm.generate(answer_briefly + prompt, EXTRACTION_MODEL)
 
 
     query = f'total employees staffs count {name} site:{base_domain}' # H
@@ -64,9 +64,7 @@ In which industry or sector does company "{name}" in, from following context:
 Total employees count of company "{name}" from the context:
 {employee_context}
 """
-    employee_count = chat.send_message(prompt)
-    chat.history.pop();chat.history.pop()
-    sheet[f'H{start}'] = employee_count.text
+    updates['H'] = llm.generate(answer_briefly + prompt, EXTRACTION_MODEL)
     
     
     query = f'geography location site:{base_domain}' # J
@@ -75,26 +73,22 @@ Total employees count of company "{name}" from the context:
 Geography of company "{name}" from following context:
 {geography_context}
 """
-    geography = chat.send_message(prompt)
-    chat.history.pop();chat.history.pop()
-    sheet[f'J{start}'] = geography.text
+    updates['J'] = llm.generate(answer_briefly + prompt, EXTRACTION_MODEL)
 
 
     query = f'parent company site:{base_domain}' # K
-    query2 = f'{sheet[f"A{start}"].value} parent company'
+    query2 = f'{name} parent company'
     parent_cmp_context = scraper.ddg_results(query, page)
     parent_cmp_context += scraper.ddg_results(query2, page)
     prompt = f"""
 Parent company of "{name}" from following context:
 {parent_cmp_context}
 """
-    parent_cmp = chat.send_message(prompt)
-    chat.history.pop();chat.history.pop()
-    sheet[f'K{start}'] = parent_cmp.text
+    updates['K'] = llm.generate(answer_briefly + prompt, EXTRACTION_MODEL)
 
 
     query = f'address location site:{base_domain}' # all address related fields
-    query2 = f'{sheet[f"A{start}"].value} address'
+    query2 = f'{name} address'
     address_context = scraper.ddg_results(query, page)
     address_context += scraper.ddg_results(query2, page)
     prompt= f"""
@@ -107,8 +101,8 @@ Give address in the following JSON structure {{
 from the context:
 {address_context}
 """
-    address = model.generate_content(prompt)
-    address = utils.clean_load_json(address.text)
+    address = llm.generate(prompt, EXTRACTION_MODEL)
+    address = utils.clean_load_json(address)
     if address is None:
         address = {
             "street": "Not found",
@@ -116,42 +110,42 @@ from the context:
             "city": "Not found",
             "country/region": "Not found"
         }
-    sheet[f'L{start}'] = str(address.get("street", "Not found"))
-    sheet[f'M{start}'] = str(address.get("zip/postal", "Not found"))
-    sheet[f'N{start}'] = str(address.get("city", "Not found"))
-    sheet[f'O{start}'] = str(address.get("country/region", "Not found"))
+    updates['L'] = str(address.get("street", "Not found"))
+    updates['M'] = str(address.get("zip/postal", "Not found"))
+    updates['N'] = str(address.get("city", "Not found"))
+    updates['O'] = str(address.get("country/region", "Not found"))
 
 
 #     query = f'email site:{base_domain}' # K
-#     query2 = f'{sheet[f'A{start}'].value} email'
+#     query2 = f'{name} email'
 #     email_context = scraper.ddg_results(query, page)
 #     email_context += scraper.ddg_results(query2, page)
 #     prompt = f"""
 # Email of "{name}" from following context:
 # {email_context}
 # """
-#     email = chat.send_message(prompt)
-#     chat.history.pop();chat.history.pop()
-#     sheet[f'Q{start}'] = email.text
+#     updates['Q'] = llm.generate(answer_briefly + prompt, EXTRACTION_MODEL)
     
 
 #     query = f'Contact phone number site:{base_domain}' # K
-#     query2 = f'{sheet[f"A{start}"].value} contact phone number'
+#     query2 = f'{name} contact phone number'
 #     number_context = scraper.ddg_results(query, page)
 #     number_context += scraper.ddg_results(query2, page)
 #     prompt = f"""
 # Contact number of "{name}" from following context:
 # {number_context}
 # """
-#     number = chat.send_message(prompt)
-#     chat.history.pop();chat.history.pop()
-#     sheet[f'R{start}'] = number.text
+#     updates['R'] = llm.generate(answer_briefly + prompt, EXTRACTION_MODEL)
     
+    log.write(start, updates)
     start += 1
-    chat.history.clear()
     print(f"Processed {name} ({start-1})")
-    wb.save("company_list.xlsx")
+    if (start - 1) % MATERIALIZE_EVERY == 0:
+        materialize("company_list.xlsx")
 
 
 scraper.close_browser(playwright, browser)
+materialize("company_list.xlsx")
+print(f"LLM usage: {llm.stats()}")
+llm.close()
 
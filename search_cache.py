@@ -0,0 +1,87 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+SEARCH_CACHE_PATH = "generated/search_cache.sqlite"
+
+
+class SearchCache:
+    """
+    Persistent cache of DuckDuckGo results keyed by (query, region).
+
+    Results are reused for `ttl` seconds. Queries that returned DuckDuckGo's
+    no-results page are cached as negatives for `negative_ttl` seconds;
+    timeouts are never cached. Safe to share between threads.
+    """
+
+    def __init__(self, path: str = SEARCH_CACHE_PATH, ttl: float = 7 * 24 * 3600,
+                 negative_ttl: float = 24 * 3600):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.counts = {"hits": 0, "negative_hits": 0, "misses": 0, "expired": 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS searches (
+                query TEXT NOT NULL,
+                region TEXT NOT NULL,
+                links TEXT NOT NULL,
+                snippets TEXT NOT NULL,
+                no_results INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (query, region)
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, query: str, region: str) -> tuple[bool, tuple[set, str] | None]:
+        """
+        Looks up a query.
+
+        Returns:
+            tuple[bool, tuple[set, str] | None]: (found, result). result is None
+            for a cached no-results answer, like `SearchClient.results`.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT links, snippets, no_results, fetched_at FROM searches WHERE query = ? AND region = ?",
+                (query, region)
+            ).fetchone()
+            if row is None:
+                self.counts["misses"] += 1
+                return False, None
+
+            links, snippets, no_results, fetched_at = row
+            if time.time() - fetched_at > (self.negative_ttl if no_results else self.ttl):
+                self.counts["expired"] += 1
+                return False, None
+            if no_results:
+                self.counts["negative_hits"] += 1
+                return True, None
+            self.counts["hits"] += 1
+            return True, (set(json.loads(links)), snippets)
+
+    def put(self, query: str, region: str, links: set, snippets: str, no_results: bool = False):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO searches VALUES (?, ?, ?, ?, ?, ?)",
+                (query, region, json.dumps(sorted(links)), snippets, int(no_results), time.time())
+            )
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, negatives = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(no_results), 0) FROM searches"
+            ).fetchone()
+        lookups = sum(self.counts.values())
+        served = self.counts["hits"] + self.counts["negative_hits"]
+        return {**self.counts, "hit_rate": served / lookups if lookups else 0.0,
+                "entries": entries, "negative_entries": negatives}
+
+    def close(self):
+        self._conn.close()
+
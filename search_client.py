@@ -0,0 +1,134 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import host_of, limiter
+from scraper import fingerprints
+from utils import extract_real_url
+
+DDG_HTML_ENDPOINT = "https://html.duckduckgo.com/html/"
+
+
+def parse_results(html: str, limit: int = 2) -> tuple[str, set, str]:
+    """
+    Parses a DuckDuckGo HTML results page, skipping ads.
+
+    Returns:
+        tuple[str, set, str]: (status, links, snippets).
+        status is "ok", "no_results" or "blocked" (CAPTCHA / anomaly page).
+        Links are the real result URLs decoded from DuckDuckGo's redirects.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    if soup.select_one(".anomaly-modal, #challenge-form"):
+        return "blocked", set(), ""
+    if soup.select_one(".no-results"):
+        return "no_results", set(), ""
+
+    results = [result for result in soup.select(".result") if "result--ad" not in result.get("class", [])]
+    links, snippets = [], []
+    for result in results[:limit]:
+        anchor = result.select_one("a.result__a")
+        if anchor and anchor.get("href"):
+            links.append(extract_real_url(anchor["href"]) or anchor["href"])
+        snippet = result.select_one(".result__snippet")
+        if snippet:
+            snippets.append(snippet.get_text(" ", strip=True))
+
+    if not results:
+        return "no_results", set(), ""
+    return "ok", set(links), "; ".join(snippets)
+
+
+class SearchClient:
+    """
+    DuckDuckGo search over plain HTTP, without a browser.
+
+    Uses one keep-alive session pool, goes through the shared rate limiter and
+    an optional `SearchCache`, and can run several queries concurrently.
+    `endpoint` can point at a local fixture server for offline testing.
+    """
+
+    def __init__(self, endpoint: str = DDG_HTML_ENDPOINT, region: str = "uk-en", cache=None,
+                 max_workers: int = 4, timeout: float = 10):
+        self.endpoint = endpoint
+        self.region = region
+        self.cache = cache
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "User-Agent": random.choice(fingerprints)["user_agent"],
+            "Accept-Language": "en-GB,en;q=0.9",
+        })
+
+    def search(self, query: str, region: str | None = None) -> tuple[str, set, str]:
+        """
+        Runs one uncached search.
+
+        Returns:
+            tuple[str, set, str]: (status, links, snippets); status is "ok",
+            "no_results", "blocked" or "timeout".
+        """
+        host = host_of(self.endpoint)
+        limiter.acquire(host)
+        try:
+            response = self.session.get(self.endpoint, params={"q": query, "kl": region or self.region},
+                                        timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"❌ Search failed for {query!r}: {e}")
+            limiter.report(host, throttled=True)
+            return "timeout", set(), ""
+
+        if response.status_code != 200:
+            limiter.report(host, response.status_code)
+            print(f"⚠️ Search for {query!r} returned {response.status_code}")
+            return ("blocked" if response.status_code == 202 else "timeout"), set(), ""
+
+        status, links, snippets = parse_results(response.text)
+        limiter.report(host, response.status_code, throttled=status == "blocked")
+        return status, links, snippets
+
+    def lookup(self, query: str) -> tuple[str, tuple[set, str] | None]:
+        """
+        Runs a search, served from the cache when possible.
+
+        Returns:
+            tuple[str, tuple[set, str] | None]: The status ("ok", "no_results",
+            "blocked" or "timeout") and (links, snippets), or None without results.
+        """
+        if self.cache is not None:
+            found, cached = self.cache.get(query, self.region)
+            if found:
+                return ("ok" if cached else "no_results"), cached
+
+        status, links, snippets = self.search(query)
+        if self.cache is not None and status in ("ok", "no_results"):
+            self.cache.put(query, self.region, links, snippets, no_results=status == "no_results")
+        return status, ((links, snippets) if status == "ok" else None)
+
+    def results(self, query: str) -> tuple[set, str] | None:
+        """
+        Runs a search, served from the cache when possible.
+
+        Returns:
+            tuple[set, str] | None: (links, snippets), or None if there were no results.
+        """
+        return self.lookup(query)[1]
+
+    def results_many(self, queries: list[str]) -> dict[str, tuple[str, tuple[set, str] | None]]:
+        """
+        Runs `lookup` for several queries concurrently.
+
+        Returns:
+            dict[str, tuple[str, tuple[set, str] | None]]: Status and result per query.
+        """
+        queries = list(dict.fromkeys(queries))
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(queries)))) as executor:
+            return dict(zip(queries, executor.map(self.lookup, queries)))
@@ -0,0 +1,29 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+
+
+def connect_shared(path: str) -> sqlite3.Connection:
+    """
+    Opens a SQLite file that several processes (and threads) read and write.
+    Transactions are explicit, see `immediate`.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+@contextmanager
+def immediate(conn: sqlite3.Connection):
+    """
+    Runs the block as one transaction holding the database's write lock, so
+    a read-modify-write never interleaves with another process.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
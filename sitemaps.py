@@ -0,0 +1,240 @@
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+import cloudscraper
+
+from rate_limiter import host_of, limiter
+
+MAX_DEPTH = 5
+SITEMAP_CACHE_PATH = "generated/sitemap_cache.sqlite"
+
+
+class SessionPool:
+    """
+    Hands out one reusable cloudscraper session per host, so repeated sitemap
+    fetches keep their connections and Cloudflare cookies.
+    """
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._sessions:
+                self._sessions[host] = cloudscraper.create_scraper()
+            return self._sessions[host]
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+session_pool = SessionPool()
+
+
+@dataclass
+class SitemapNode:
+    """
+    One sitemap document: an index pointing at child sitemaps, or a leaf
+    `urlset` listing page URLs. `kind` is "error" if it could not be fetched or parsed.
+    """
+    url: str
+    kind: str
+    children: list["SitemapNode"] = field(default_factory=list)
+    urls: list[str] = field(default_factory=list)
+
+    def leaves(self) -> list["SitemapNode"]:
+        if self.kind == "urlset":
+            return [self]
+        return [leaf for child in self.children for leaf in child.leaves()]
+
+
+def parse_sitemap_document(url: str, content: bytes) -> SitemapNode:
+    """
+    Parses a sitemap document, transparently decompressing .xml.gz files.
+    Child sitemaps are returned as unfetched nodes of kind "pending".
+    """
+    if content[:2] == b"\x1f\x8b":
+        content = gzip.decompress(content)
+
+    root = ET.fromstring(content)
+    if root.tag.endswith("sitemapindex"):
+        children = [SitemapNode(loc.text.strip(), "pending")
+                    for loc in root.findall(".//{*}sitemap/{*}loc") if loc.text]
+        return SitemapNode(url, "index", children=children)
+    if root.tag.endswith("urlset"):
+        urls = [loc.text.strip() for loc in root.findall(".//{*}url/{*}loc") if loc.text]
+        return SitemapNode(url, "urlset", urls=urls)
+
+    print(f"⚠️ Unknown XML root tag in {url}: {root.tag}")
+    return SitemapNode(url, "error")
+
+
+def fetch_sitemap(url: str, pool: SessionPool = session_pool) -> SitemapNode:
+    try:
+        limiter.acquire(host_of(url))
+        res = pool.get(url).get(url, timeout=10)
+        limiter.report(host_of(url), res.status_code)
+        if res.status_code != 200:
+            print(f"❌ Failed to fetch {url}")
+            return SitemapNode(url, "error")
+        return parse_sitemap_document(url, res.content)
+    except Exception as e:
+        print(f"⚠️ Error parsing {url}: {e}")
+        return SitemapNode(url, "error")
+
+
+def crawl_sitemap_tree(sitemap_url: str, max_workers: int = 8, pool: SessionPool = session_pool,
+                       fetch=fetch_sitemap) -> SitemapNode:
+    """
+    Fetches a sitemap and all nested child sitemaps, one tree level at a time
+    with up to `max_workers` documents downloaded concurrently.
+
+    Args:
+        sitemap_url (str): Root sitemap or sitemap index URL.
+        max_workers (int): Maximum concurrent fetches.
+        pool (SessionPool): Per-host session pool.
+        fetch: Function (url, pool) -> SitemapNode used to load one document.
+
+    Returns:
+        SitemapNode: Root of the tree (index → leaves → URLs).
+    """
+    root = fetch(sitemap_url, pool)
+    seen = {sitemap_url}
+    frontier = [root]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for _ in range(MAX_DEPTH):
+            pending = []
+            for node in frontier:
+                # Skip sitemaps already visited elsewhere in the tree to avoid cycles
+                children = []
+                for child in node.children:
+                    if child.url not in seen:
+                        seen.add(child.url)
+                        children.append(child)
+                node.children = children
+                pending.extend(children)
+            if not pending:
+                break
+
+            fetched = list(executor.map(lambda child: fetch(child.url, pool), pending))
+            for child, result in zip(pending, fetched):
+                child.kind, child.children, child.urls = result.kind, result.children, result.urls
+            frontier = [child for child in pending if child.kind == "index"]
+
+    return root
+
+
+class SitemapCache:
+    """
+    Persistent cache of parsed sitemap documents, grouped by domain.
+
+    Documents fetched within `fresh_for` seconds are served from disk. Older
+    ones are revalidated with a conditional GET (If-None-Match /
+    If-Modified-Since) and only re-parsed when the server sends a new copy.
+    Pass `fetch` to `crawl_sitemap_tree` to crawl through the cache.
+    """
+
+    def __init__(self, path: str = SITEMAP_CACHE_PATH, fresh_for: float = 6 * 3600):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.fresh_for = fresh_for
+        self.hits = 0
+        self.revalidated = 0
+        self.downloads = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS sitemaps (
+                url TEXT PRIMARY KEY,
+                domain TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                children TEXT NOT NULL,
+                urls TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sitemaps_domain ON sitemaps (domain)")
+        self._conn.commit()
+
+    def _load(self, url: str):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT kind, children, urls, etag, last_modified, fetched_at FROM sitemaps WHERE url = ?", (url,)
+            ).fetchone()
+
+    def _store(self, node: SitemapNode, etag: str | None, last_modified: str | None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sitemaps VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (node.url, urlparse(node.url).netloc, node.kind,
+                 json.dumps([child.url for child in node.children]), json.dumps(node.urls),
+                 etag, last_modified, time.time())
+            )
+            self._conn.commit()
+
+    def _touch(self, url: str):
+        with self._lock:
+            self._conn.execute("UPDATE sitemaps SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+
+    def fetch(self, url: str, pool: SessionPool = session_pool) -> SitemapNode:
+        """
+        Drop-in replacement for `fetch_sitemap` that goes through the cache.
+        """
+        cached = self._load(url)
+        if cached:
+            kind, children, urls, etag, last_modified, fetched_at = cached
+            node = SitemapNode(url, kind, [SitemapNode(child, "pending") for child in json.loads(children)],
+                               json.loads(urls))
+            if time.time() - fetched_at < self.fresh_for:
+                self.hits += 1
+                return node
+
+        headers = {}
+        if cached and cached[3]:
+            headers["If-None-Match"] = cached[3]
+        if cached and cached[4]:
+            headers["If-Modified-Since"] = cached[4]
+
+        try:
+            limiter.acquire(host_of(url))
+            res = pool.get(url).get(url, timeout=10, headers=headers)
+            limiter.report(host_of(url), res.status_code)
+            if res.status_code == 304 and cached:
+                self.revalidated += 1
+                self._touch(url)
+                return node
+            if res.status_code != 200:
+                print(f"❌ Failed to fetch {url}")
+                return node if cached else SitemapNode(url, "error")
+            fresh = parse_sitemap_document(url, res.content)
+        except Exception as e:
+            print(f"⚠️ Error parsing {url}: {e}")
+            return node if cached else SitemapNode(url, "error")
+
+        self.downloads += 1
+        if fresh.kind != "error":
+            self._store(fresh, res.headers.get("ETag"), res.headers.get("Last-Modified"))
+        return fresh
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "revalidated": self.revalidated, "downloads": self.downloads}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,36 @@
+import sqlite3
+
+
+def evict_lru(conn: sqlite3.Connection, table: str, keys: list[str], size: str, max_bytes: int,
+              headroom: float = 0.9) -> int:
+    """
+    Keeps a SQLite table under a size cap by deleting its least recently used rows.
+
+    Nothing happens while the table is within `max_bytes`; once over, rows are
+    deleted in `last_access` order until it is back under `headroom` of the cap,
+    so the next few inserts don't each trigger another eviction.
+
+    Args:
+        table (str): Table with a `last_access` column.
+        keys (list[str]): Columns that identify a row, e.g. its primary key.
+        size (str): SQL expression for a row's size in bytes, e.g. "LENGTH(vector)".
+        max_bytes (int): Size cap for the sum of `size` over the table.
+
+    Returns:
+        int: Number of rows deleted.
+    """
+    total = conn.execute(f"SELECT COALESCE(SUM({size}), 0) FROM {table}").fetchone()[0]
+    if total <= max_bytes:
+        return 0
+
+    target = total - int(max_bytes * headroom)
+    freed = 0
+    stale = []
+    for *key, row_size in conn.execute(f"SELECT {', '.join(keys)}, {size} FROM {table} ORDER BY last_access"):
+        if freed >= target:
+            break
+        stale.append(key)
+        freed += row_size
+    conn.executemany(f"DELETE FROM {table} WHERE {' AND '.join(f'{key} = ?' for key in keys)}", stale)
+    conn.commit()
+    return len(stale)
@@ -0,0 +1,318 @@
+import json
+import re
+from collections import Counter
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from urllib.parse import unquote, urlparse
+
+from extraction import extract_text
+
+# Values at or above this confidence are final: their questions and prompt fields are skipped
+STRUCTURED_MIN_CONFIDENCE = 0.8
+# Values that may belong to another company or are only a range: they fill gaps the model leaves
+OFF_SITE_CONFIDENCE = 0.7
+RANGE_CONFIDENCE = 0.5
+# Part of the "structured" checkpoint inputs; bump it when the extraction rules change
+STRUCTURED_VERSION = 2
+
+ORGANIZATION_TYPES = {"Organization", "Corporation", "LocalBusiness", "OnlineBusiness", "ProfessionalService",
+                      "NGO", "EducationalOrganization"}
+
+# Microdata itemprop names mapped to the extraction fields
+MICRODATA_FIELDS = {
+    "streetAddress": "street",
+    "postalCode": "postal/zip_code",
+    "addressLocality": "city",
+    "addressCountry": "country/region",
+    "email": "email",
+    "telephone": "phone_number",
+    "numberOfEmployees": "employee_head_count",
+}
+ADDRESS_KEYS = ["streetAddress", "postalCode", "addressLocality", "addressCountry"]
+
+EMAIL = re.compile(r"^[\w.+-]+@[\w-]+(\.[\w-]+)+$")
+HEAD_COUNT_RANGE = re.compile(r"(\d[\d,]*)\s*(?:-|–|to)\s*(\d[\d,]*)")
+INTEGER = re.compile(r"\d[\d,]*")
+UK_POSTCODE = re.compile(r"\b([A-Z]{1,2}\d[A-Z\d]?) ?(\d[A-Z]{2})\b")
+
+
+@dataclass
+class FieldValue:
+    value: object
+    confidence: float
+    source: str
+
+
+class _StructuredParser(HTMLParser):
+    """
+    Collects mailto/tel links, JSON-LD blocks and microdata properties in one pass.
+    Address properties are grouped per PostalAddress item, the rest of the page's
+    address properties form one more group.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.emails = []
+        self.phones = []
+        self.json_ld = []
+        self.microdata = []
+        self._script = None
+        self._captures = []
+        self._address_scopes = []
+        self._addresses = []
+        self._loose_address = {}
+
+    @property
+    def addresses(self) -> list[dict]:
+        groups = self._addresses + [scope[2] for scope in self._address_scopes] + [self._loose_address]
+        return [group for group in groups if group]
+
+    def _address(self) -> dict:
+        return self._address_scopes[-1][2] if self._address_scopes else self._loose_address
+
+    def _property(self, prop: str, value: str, address: dict):
+        if prop in ADDRESS_KEYS:
+            address.setdefault(prop, value)
+        else:
+            self.microdata.append((prop, value))
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        href = (attrs.get("href") or "").strip()
+        if tag == "a" and href.lower().startswith("mailto:"):
+            self.emails.append(unquote(href[7:].split("?")[0]).strip())
+        elif tag == "a" and href.lower().startswith("tel:"):
+            self.phones.append(unquote(href[4:]).strip())
+
+        if tag == "script" and (attrs.get("type") or "").lower() == "application/ld+json":
+            self._script = []
+
+        for capture in self._captures:
+            if capture[0] == tag:
+                capture[2] += 1
+        for scope in self._address_scopes:
+            if scope[0] == tag:
+                scope[1] += 1
+        prop = attrs.get("itemprop")
+        if prop in MICRODATA_FIELDS:
+            value = attrs.get("content") or attrs.get("href")
+            if value is not None or tag in ("meta", "link"):
+                self._property(prop, value or "", self._address())
+            else:
+                self._captures.append([tag, prop, 1, [], self._address()])
+        if "itemscope" in attrs and (attrs.get("itemtype") or "").endswith("PostalAddress"):
+            self._address_scopes.append([tag, 1, {}])
+
+    def handle_endtag(self, tag):
+        if tag == "script" and self._script is not None:
+            self.json_ld.append("".join(self._script))
+            self._script = None
+        for capture in list(self._captures):
+            if capture[0] == tag:
+                capture[2] -= 1
+                if capture[2] == 0:
+                    self._captures.remove(capture)
+                    self._property(capture[1], " ".join("".join(capture[3]).split()), capture[4])
+        for scope in list(self._address_scopes):
+            if scope[0] == tag:
+                scope[1] -= 1
+                if scope[1] == 0:
+                    self._address_scopes.remove(scope)
+                    self._addresses.append(scope[2])
+
+    def handle_data(self, data):
+        if self._script is not None:
+            self._script.append(data)
+            return
+        for capture in self._captures:
+            capture[3].append(data)
+
+
+def _top_level(data):
+    """
+    Yields the JSON-LD document's own objects: top-level ones and @graph members, not nested values
+    such as a parentOrganization, publisher or brand.
+    """
+    for item in data if isinstance(data, list) else [data]:
+        if not isinstance(item, dict):
+            continue
+        yield item
+        graph = item.get("@graph") or []
+        yield from (node for node in (graph if isinstance(graph, list) else [graph]) if isinstance(node, dict))
+
+
+def _types(obj: dict) -> set:
+    types = obj.get("@type") or []
+    return set(types if isinstance(types, list) else [types])
+
+
+def _name(value) -> str | None:
+    if isinstance(value, dict):
+        value = value.get("name")
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if not value:
+        return None
+    return str(value).strip() or None
+
+
+def _integer(value) -> int | None:
+    match = INTEGER.search(str(value if value is not None else ""))
+    return int(match.group().replace(",", "")) if match else None
+
+
+def _head_count(value) -> tuple[int | str | None, bool]:
+    """
+    Parses a numberOfEmployees value.
+
+    Returns:
+        tuple[int | str | None, bool]: The head count and whether it is exact. Ranges come
+        back as "51-200" and open-ended counts as "1000+", neither exact.
+    """
+    if isinstance(value, dict):
+        if value.get("value") is not None:
+            value = value["value"]
+        else:
+            low, high = _integer(value.get("minValue")), _integer(value.get("maxValue"))
+            if low is not None and high is not None:
+                return (low, True) if low == high else (f"{low}-{high}", False)
+            if low is not None:
+                return f"{low}+", False
+            return high, False
+    text = str(value if value is not None else "")
+    match = HEAD_COUNT_RANGE.search(text)
+    if match:
+        low, high = (int(group.replace(",", "")) for group in match.groups())
+        return (low, True) if low == high else (f"{low}-{high}", False)
+    count = _integer(text)
+    if count is None:
+        return None, False
+    if "+" in text:
+        return f"{count}+", False
+    return count, True
+
+
+def _on_site(url, domain: str | None) -> bool:
+    host = (urlparse(url).hostname or "") if isinstance(url, str) else ""
+    host = host.lower().removeprefix("www.")
+    return bool(domain) and bool(host) and (host == domain or host.endswith("." + domain))
+
+
+def _from_json_ld(block: str, domain: str | None) -> tuple[list[tuple[str, object, float]], list[tuple[dict, float]]]:
+    """
+    Reads the company's Organization nodes of a JSON-LD block.
+
+    Only top-level and @graph nodes count. When one of them has a `url` or `@id` on the company
+    domain only those are read; otherwise every Organization node is read at OFF_SITE_CONFIDENCE.
+
+    Returns:
+        tuple[list[tuple[str, object, float]], list[tuple[dict, float]]]: (field, value, confidence)
+        candidates, and each address as its fields with a confidence.
+    """
+    try:
+        data = json.loads(block)
+    except json.JSONDecodeError:
+        return [], []
+    organizations = [obj for obj in _top_level(data) if _types(obj) & ORGANIZATION_TYPES]
+    own = [obj for obj in organizations if _on_site(obj.get("url"), domain) or _on_site(obj.get("@id"), domain)]
+    confidence = 0.95 if own else OFF_SITE_CONFIDENCE
+
+    found = []
+    addresses = []
+    for obj in own or organizations:
+        address = obj.get("address")
+        if isinstance(address, list):
+            address = address[0] if address else None
+        if isinstance(address, dict):
+            parts = {MICRODATA_FIELDS[key]: _name(address[key]) for key in ADDRESS_KEYS if address.get(key)}
+            parts = {field: value for field, value in parts.items() if value}
+            if parts:
+                addresses.append((parts, confidence))
+        for key, field in (("email", "email"), ("telephone", "phone_number")):
+            if isinstance(obj.get(key), str) and obj[key].strip():
+                found.append((field, obj[key].strip().removeprefix("mailto:"), confidence))
+        if obj.get("numberOfEmployees") is not None:
+            count, exact = _head_count(obj["numberOfEmployees"])
+            found.append(("employee_head_count", count, confidence if exact else RANGE_CONFIDENCE))
+        if obj.get("parentOrganization"):
+            found.append(("parent_company", _name(obj["parentOrganization"]), confidence))
+    return [(field, value, conf) for field, value, conf in found if value], addresses
+
+
+def _email_domain_matches(email: str, domain: str | None) -> bool:
+    host = email.rsplit("@", 1)[-1].lower()
+    return bool(domain) and (host == domain or host.endswith("." + domain) or domain.endswith("." + host))
+
+
+def extract_structured(documents: list[tuple[str, str]], domain: str | None = None) -> dict[str, FieldValue]:
+    """
+    Extracts fields that pages state in machine-readable form, without any model call.
+
+    Sources, most trusted first: schema.org Organization JSON-LD, microdata
+    properties, mailto:/tel: links, and UK postcodes in the visible text.
+    Emails on the company's own domain are trusted more than others. The
+    address fields all come from the single best address found, never mixed
+    across offices or pages.
+
+    Args:
+        documents (list[tuple[str, str]]): (url, html) pairs of the company's pages.
+        domain (str | None): Company domain, e.g. "acme.com".
+
+    Returns:
+        dict[str, FieldValue]: Extraction field name to the best value found,
+        its confidence (0–1) and where it came from.
+    """
+    domain = (domain or "").lower().removeprefix("www.") or None
+    candidates = []
+    addresses = []
+    for url, html in documents:
+        if not html:
+            continue
+        parser = _StructuredParser()
+        parser.feed(html)
+        parser.close()
+        for block in parser.json_ld:
+            fields, blocks = _from_json_ld(block, domain)
+            candidates += [(field, value, confidence, "json-ld") for field, value, confidence in fields]
+            addresses += [(parts, confidence, "json-ld") for parts, confidence in blocks]
+        for prop, value in parser.microdata:
+            field = MICRODATA_FIELDS[prop]
+            confidence = 0.85
+            if field == "employee_head_count":
+                value, exact = _head_count(value)
+                confidence = confidence if exact else RANGE_CONFIDENCE
+            else:
+                value = re.sub(r"^(mailto|tel):", "", value.strip())
+            if value:
+                candidates.append((field, value, confidence, "microdata"))
+        for group in parser.addresses:
+            parts = {MICRODATA_FIELDS[key]: " ".join(value.split()) for key, value in group.items()}
+            parts = {field: value for field, value in parts.items() if value}
+            if parts:
+                addresses.append((parts, 0.85, "microdata"))
+        for email in parser.emails:
+            if EMAIL.match(email):
+                confidence = 0.9 if _email_domain_matches(email, domain) else 0.6
+                candidates.append(("email", email.lower(), confidence, "mailto"))
+        for phone in parser.phones:
+            if len(re.sub(r"\D", "", phone)) >= 7:
+                candidates.append(("phone_number", phone, 0.85, "tel"))
+        for outward, inward in UK_POSTCODE.findall(extract_text(html)):
+            addresses.append(({"postal/zip_code": f"{outward} {inward}"}, 0.6, "text"))
+
+    counts = Counter((field, str(value)) for field, value, *_ in candidates)
+    best = {}
+    for field, value, confidence, source in candidates:
+        rank = (confidence, counts[field, str(value)])
+        current = best.get(field)
+        if current is None or rank > (current.confidence, counts[field, str(current.value)]):
+            best[field] = FieldValue(value, confidence, source)
+
+    # The most trusted, most complete and most repeated address wins as a whole
+    address_counts = Counter(tuple(sorted(parts.items())) for parts, *_ in addresses)
+    if addresses:
+        parts, confidence, source = max(
+            addresses, key=lambda a: (a[1], len(a[0]), address_counts[tuple(sorted(a[0].items()))])
+        )
+        best.update({field: FieldValue(value, confidence, source) for field, value in parts.items()})
+    return best
@@ -0,0 +1,103 @@
+import re
+from dataclasses import dataclass, field
+
+# Path keywords per topic, strongest first; the topics cover the 12 extraction questions
+TOPIC_KEYWORDS = {
+    "about": ["about", "about-us", "company", "who-we-are", "our-story", "overview", "mission"],
+    "contact": ["contact", "contact-us", "locations", "offices", "imprint", "impressum", "legal-notice"],
+    "team": ["team", "our-team", "leadership", "management", "people", "careers", "jobs"],
+    "investors": ["investors", "investor-relations", "funding", "shareholders", "press", "news"],
+    "customers": ["customers", "clients", "case-studies", "case-study", "testimonials", "success-stories",
+                  "partners"],
+    "offering": ["products", "solutions", "services", "platform", "industries", "pricing", "enterprise"],
+}
+
+# Candidates kept for the selection prompts
+PATH_SHORTLIST = 40
+SITEMAP_SHORTLIST = 20
+
+ENGLISH_PREFIXES = {"en", "en-gb", "en-us", "en_gb", "en_us", "uk", "us", "gb"}
+LANGUAGE_PREFIX = re.compile(r"^[a-z]{2}([-_][a-z]{2})?$")
+NOISE = re.compile(
+    r"/(tag|tags|category|categories|author|page/\d+|feed|wp-content|wp-json|cart|checkout|login|search)(/|$)"
+    r"|/\d{4}/\d{2}/|\.(pdf|jpe?g|png|gif|svg|zip|xml|json)$",
+    re.IGNORECASE
+)
+
+
+@dataclass
+class RankedPath:
+    path: str
+    score: float
+    topics: list[str] = field(default_factory=list)
+    exact: bool = False
+
+
+def score_path(path: str) -> RankedPath:
+    """
+    Scores how likely a path is to answer the extraction questions.
+
+    Keyword matches on a whole path segment score highest, partial matches
+    less; deep paths, non-English language prefixes and listing/asset/blog
+    date paths are penalised.
+    """
+    segments = [segment for segment in path.lower().strip("/").split("/") if segment]
+    score = 0.0
+    topics = []
+    exact = False
+
+    for topic, keywords in TOPIC_KEYWORDS.items():
+        best = 0.0
+        for rank, keyword in enumerate(keywords):
+            weight = 3.0 - rank * 0.2
+            if keyword in segments:
+                best = max(best, weight + 1.0)
+                exact = True
+            elif any(keyword in segment for segment in segments):
+                best = max(best, weight * 0.5)
+        if best:
+            topics.append(topic)
+            score += best
+
+    if segments and LANGUAGE_PREFIX.match(segments[0]) and segments[0] not in ENGLISH_PREFIXES:
+        score -= 4.0
+    if NOISE.search(path):
+        score -= 5.0
+    score -= 0.5 * max(0, len(segments) - 1)
+    return RankedPath(path, round(score, 2), topics, exact)
+
+
+def shortlist_paths(paths: list[str], top_n: int = PATH_SHORTLIST) -> list[RankedPath]:
+    """
+    Ranks paths locally and keeps the `top_n` best, best first.
+    """
+    ranked = sorted((score_path(path) for path in dict.fromkeys(paths)), key=lambda r: (-r.score, len(r.path)))
+    return ranked[:top_n]
+
+
+def confident_selection(ranked: list[RankedPath], min_topics: int = 4, min_score: float = 3.0,
+                        topics: list[str] | None = None) -> list[str] | None:
+    """
+    Picks the best path per topic when the ranking is clear enough to skip the LLM.
+
+    The ranking is confident when at least `min_topics` topics each have a
+    path that matches a keyword as a whole segment and scores `min_score` or more.
+
+    Args:
+        topics (list[str] | None): Only these topics are needed; when fewer than
+            `min_topics`, covering all of them is enough. Defaults to every topic.
+
+    Returns:
+        list[str] | None: One path per covered topic, or None to fall back to the LLM.
+    """
+    wanted = set(TOPIC_KEYWORDS if topics is None else topics)
+    best = {}
+    for candidate in ranked:
+        if candidate.score < min_score or not candidate.exact:
+            continue
+        for topic in candidate.topics:
+            if topic in wanted:
+                best.setdefault(topic, candidate.path)
+    if not wanted or len(best) < min(min_topics, len(wanted)):
+        return None
+    return list(dict.fromkeys(best.values()))
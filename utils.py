@@ -1,14 +1,11 @@
 from urllib.parse import urlparse, parse_qs, unquote, urljoin
-import requests
 from playwright.sync_api import sync_playwright
-from bs4 import BeautifulSoup
-import random
 import re
 import json
-import time
 import tldextract
 import cloudscraper
-import xml.etree.ElementTree as ET
+from sitemaps import crawl_sitemap_tree
+from rate_limiter import host_of, limiter
 
 def extract_real_url(ddg_redirect_url):
     parsed = urlparse(ddg_redirect_url)
@@ -18,27 +15,6 @@ def extract_real_url(ddg_redirect_url):
 def extract_paths_from_csv(path_string: str) -> list[str]:
     return [path.strip() for path in path_string.strip().split(",") if path.strip()]
 
-def ddg_results2(query):
-    params = {
-        "q": query,
-        "kl": "uk-en"
-    }
-    url = "https://html.duckduckgo.com/html/"  # lightweight, HTML-only endpoint
-    headers = {
-        "User-Agent": random.choice([
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36...",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)...",
-        ])
-    }
-    response = requests.get(url, headers=headers, params=params)
-    time.sleep(random.uniform(1, 3.5)) 
-
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    snippets = soup.find_all("a", class_="result__snippet", limit=2)
-    snippet_texts = '; '.join([snippet.get_text(strip=True) for snippet in snippets])
-    return snippet_texts
-    
 def clean_load_json(response_text: str):
     """
     Cleans and loads a JSON string from Gemini response text.
@@ -83,7 +59,9 @@ def find_sitemap_url(url: str) -> str | None:
         base_url = base_url.rstrip("/")
         robots_url = urljoin(base_url, "/robots.txt")
         try:
+            limiter.acquire(host_of(robots_url))
             response = scraper.get(robots_url, timeout=5)
+            limiter.report(host_of(robots_url), response.status_code)
             if response.status_code == 200:
                 sitemap_matches = re.findall(r"Sitemap:\s*(\S+)", response.text, re.IGNORECASE)
                 if sitemap_matches:
@@ -94,7 +72,9 @@ def find_sitemap_url(url: str) -> str | None:
         # Try fallback /sitemap.xml
         fallback_sitemap = urljoin(base_url, "/sitemap.xml")
         try:
+            limiter.acquire(host_of(fallback_sitemap))
             res = scraper.get(fallback_sitemap, timeout=5)
+            limiter.report(host_of(fallback_sitemap), res.status_code)
             if res.status_code == 200 and 'xml' in res.headers.get('Content-Type', ''):
                 return fallback_sitemap
         except Exception:
@@ -118,45 +98,24 @@ def find_sitemap_url(url: str) -> str | None:
 
     return None
 
-def get_all_sitemap_urls(sitemap_url: str) -> list[str]:
+def sitemap_paths(leaves, max_segments: int = 2) -> list[str]:
     """
-    Returns a flat list of all URL strings found.
+    Returns the paths of all page URLs in the leaf sitemaps that are at most `max_segments` deep.
     """
-    scraper = cloudscraper.create_scraper()
     all_urls = []
-
-    def parse_sitemap(url: str):
-        try:
-            res = scraper.get(url, timeout=10)
-            if res.status_code != 200:
-                print(f"❌ Failed to fetch {url}")
-                return
-
-            root = ET.fromstring(res.text)
-
-            if root.tag.endswith("sitemapindex"):
-                # Sitemap index: contains nested <sitemap> entries
-                for sitemap in root.findall(".//{*}sitemap/{*}loc"):
-                    child_sitemap_url = sitemap.text.strip()
-                    parse_sitemap(child_sitemap_url)
-            elif root.tag.endswith("urlset"):
-                # Regular sitemap: contains <url> entries
-                for url_tag in root.findall(".//{*}url/{*}loc"):
-                    path = urlparse(url_tag.text.strip()).path
-                    
-                    if (len([segment for segment in path.strip("/").split("/") if segment]) <=2):
-                        all_urls.append(path)
-            else:
-                print(f"⚠️ Unknown XML root tag in {url}: {root.tag}")
-
-        except Exception as e:
-            print(f"⚠️ Error parsing {url}: {e}")
-
-    parse_sitemap(sitemap_url)
-    # print(f'\n\n count: {len(all_urls)}')
+    for leaf in leaves:
+        for url in leaf.urls:
+            path = urlparse(url).path
+            if (len([segment for segment in path.strip("/").split("/") if segment]) <= max_segments):
+                all_urls.append(path)
     return all_urls
 
 
+def get_all_sitemap_urls(sitemap_url: str) -> list[str]:
+    """
+    Returns a flat list of all URL strings found.
+    """
+    return sitemap_paths(crawl_sitemap_tree(sitemap_url).leaves())
 
 
 def get_leaf_sitemaps(sitemap_url: str) -> list[str]:
@@ -164,36 +123,7 @@ def get_leaf_sitemaps(sitemap_url: str) -> list[str]:
     Recursively fetches only the leaf sitemap URLs (sitemaps that contain <url> tags)
     from a sitemap index and nested sitemaps.
     """
-    scraper = cloudscraper.create_scraper()
-    leaf_sitemaps = []
-
-    def parse_sitemap(url: str):
-        try:
-            res = scraper.get(url, timeout=10)
-            if res.status_code != 200:
-                print(f"❌ Failed to fetch {url}")
-                return
-
-            root = ET.fromstring(res.text)
-
-            if root.tag.endswith("sitemapindex"):
-                # Contains nested sitemaps
-                for sitemap in root.findall(".//{*}sitemap/{*}loc"):
-                    child_sitemap_url = sitemap.text.strip()
-                    parse_sitemap(child_sitemap_url)
-
-            elif root.tag.endswith("urlset"):
-                # This is a leaf sitemap (contains actual URLs)
-                leaf_sitemaps.append(url)
-
-            else:
-                print(f"⚠️ Unknown XML root tag in {url}: {root.tag}")
-
-        except Exception as e:
-            print(f"⚠️ Error parsing {url}: {e}")
-
-    parse_sitemap(sitemap_url)
-    return leaf_sitemaps
+    return [leaf.url for leaf in crawl_sitemap_tree(sitemap_url).leaves()]
 
 
 def is_valid_path(path: str) -> bool:
@@ -0,0 +1,223 @@
+import glob
+import json
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+
+import faiss
+import numpy as np
+
+DEFAULT_STORE_DIR = "embeddings/store"
+
+
+class VectorStore:
+    """
+    Single on-disk store for chunk vectors, chunk text and company IDs.
+
+    Vectors are appended to one raw float32 file that is memory-mapped for
+    search; chunk text and company IDs live in a SQLite table whose row id is
+    the vector's position in that file, along with the URL each chunk came
+    from when known. Replacing a company tombstones its old rows, and
+    `compact` rewrites the files without them.
+    """
+
+    def __init__(self, directory: str = DEFAULT_STORE_DIR, dim: int | None = None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self._conn = sqlite3.connect(os.path.join(directory, "chunks.sqlite"), timeout=60)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                company_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                deleted INTEGER NOT NULL DEFAULT 0,
+                source TEXT
+            )
+        """)
+        # Stores created before chunks had a source URL
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(chunks)")]
+        if "source" not in columns:
+            self._conn.execute("ALTER TABLE chunks ADD COLUMN source TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_company ON chunks (company_id, deleted)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+
+        stored_dim = self._conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        if stored_dim:
+            self.dim = int(stored_dim[0])
+            if dim is not None and dim != self.dim:
+                raise ValueError(f"Store at {directory} holds {self.dim}-d vectors, got dim={dim}")
+        else:
+            self.dim = dim
+        self._mmap = None
+
+    def _vectors(self) -> np.ndarray:
+        """
+        Returns a read-only memory map over all stored vectors, remapping if the file grew.
+        """
+        if not self.dim or not os.path.exists(self.vectors_path):
+            return np.zeros((0, self.dim or 0), dtype="float32")
+        rows = os.path.getsize(self.vectors_path) // (4 * self.dim)
+        if self._mmap is None or self._mmap.shape[0] != rows:
+            self._mmap = np.memmap(self.vectors_path, dtype="float32", mode="r", shape=(rows, self.dim))
+        return self._mmap
+
+    @contextmanager
+    def _write_lock(self):
+        """
+        Holds SQLite's write lock for the block and commits at the end.
+
+        Runner workers share one store, so every change to the vector file
+        happens under this lock: row ids are taken from the file size, and
+        the append and the insert must not interleave with another process.
+        """
+        self._conn.commit()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.rollback()
+            raise
+        self._conn.commit()
+
+    def add(self, company_id: str, chunks: list[str], vectors: np.ndarray, sources: list[str] | None = None):
+        """
+        Appends chunks and their vectors for a company, optionally with each chunk's source URL.
+        """
+        with self._write_lock():
+            self._add(company_id, chunks, vectors, sources)
+
+    def _add(self, company_id: str, chunks: list[str], vectors: np.ndarray, sources: list[str] | None):
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        if len(chunks) != len(vectors):
+            raise ValueError("Chunks and vectors must have the same length.")
+        sources = sources if sources is not None else [None] * len(chunks)
+        if len(sources) != len(chunks):
+            raise ValueError("Chunks and sources must have the same length.")
+        if not chunks:
+            return
+        # Another process may have stored the dimension since this store was opened
+        stored_dim = self._conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        if stored_dim is None:
+            self.dim = self.dim or vectors.shape[1]
+            self._conn.execute("INSERT INTO meta VALUES ('dim', ?)", (str(self.dim),))
+        else:
+            self.dim = int(stored_dim[0])
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-d vectors, got {vectors.shape[1]}-d.")
+
+        first_id = len(self._vectors())
+        with open(self.vectors_path, "ab") as f:
+            f.write(vectors.tobytes())
+        position = self._conn.execute(
+            "SELECT COALESCE(MAX(position) + 1, 0) FROM chunks WHERE company_id = ? AND deleted = 0",
+            (company_id,)
+        ).fetchone()[0]
+        self._conn.executemany(
+            "INSERT INTO chunks (id, company_id, position, text, source) VALUES (?, ?, ?, ?, ?)",
+            [(first_id + i, company_id, position + i, text, source)
+             for i, (text, source) in enumerate(zip(chunks, sources))]
+        )
+
+    def replace(self, company_id: str, chunks: list[str], vectors: np.ndarray, sources: list[str] | None = None):
+        """
+        Replaces everything stored for a company with the given chunks and vectors.
+        """
+        with self._write_lock():
+            self._conn.execute("UPDATE chunks SET deleted = 1 WHERE company_id = ?", (company_id,))
+            self._add(company_id, chunks, vectors, sources)
+
+    def delete(self, company_id: str):
+        with self._write_lock():
+            self._conn.execute("UPDATE chunks SET deleted = 1 WHERE company_id = ?", (company_id,))
+
+    def has_company(self, company_id: str) -> bool:
+        return self._conn.execute(
+            "SELECT 1 FROM chunks WHERE company_id = ? AND deleted = 0 LIMIT 1", (company_id,)
+        ).fetchone() is not None
+
+    def distances(self, company_id: str, query_vectors: np.ndarray) -> np.ndarray:
+        """
+        Squared L2 distance from each query vector to each of the company's chunks.
+
+        Returns:
+            np.ndarray: float32 array of shape (len(query_vectors), chunks), chunks in position order.
+        """
+        ids = np.array([row_id for (row_id,) in self._conn.execute(
+            "SELECT id FROM chunks WHERE company_id = ? AND deleted = 0 ORDER BY position", (company_id,)
+        )], dtype="int64")
+        queries = np.ascontiguousarray(query_vectors, dtype="float32")
+        if not len(ids):
+            return np.zeros((len(queries), 0), dtype="float32")
+        company_vectors = np.asarray(self._vectors()[ids], dtype="float32")
+        distances = ((queries ** 2).sum(axis=1)[:, None] + (company_vectors ** 2).sum(axis=1)[None, :]
+                     - 2 * queries @ company_vectors.T)
+        return np.maximum(distances, 0)
+
+    def compact(self):
+        """
+        Rewrites the vector file and table without tombstoned rows.
+        """
+        with self._write_lock():
+            self._compact()
+
+    def _compact(self):
+        rows = self._conn.execute(
+            "SELECT id, company_id, position, text, source FROM chunks WHERE deleted = 0 ORDER BY id"
+        ).fetchall()
+        ids = np.array([row_id for row_id, *_ in rows], dtype="int64")
+        vectors = self._vectors()
+        tmp_path = self.vectors_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for start in range(0, len(ids), 65536):
+                f.write(np.ascontiguousarray(vectors[ids[start:start + 65536]]).tobytes())
+        # Drop the memory map before swapping files, Windows will not replace a mapped file
+        del vectors
+        self._mmap = None
+        os.replace(tmp_path, self.vectors_path)
+
+        self._conn.execute("DELETE FROM chunks")
+        self._conn.executemany(
+            "INSERT INTO chunks (id, company_id, position, text, source) VALUES (?, ?, ?, ?, ?)",
+            [(new_id, *row[1:]) for new_id, row in enumerate(rows)]
+        )
+
+    def import_legacy_files(self, embeddings_dir: str = "embeddings", generated_dir: str = "generated") -> int:
+        """
+        Loads the old per-row `cmp_<row>.index` + `chunks_cmp_<row>.json` pairs into the store.
+
+        Returns:
+            int: Number of companies imported.
+        """
+        imported = 0
+        for index_path in sorted(glob.glob(os.path.join(embeddings_dir, "cmp_*.index"))):
+            row = re.fullmatch(r"cmp_(\d+)\.index", os.path.basename(index_path))
+            chunks_path = os.path.join(generated_dir, f"chunks_cmp_{row.group(1)}.json") if row else None
+            if not chunks_path or not os.path.exists(chunks_path):
+                print(f"⚠️ Skipping {index_path}: no matching chunks file")
+                continue
+
+            with open(chunks_path, encoding="utf-8") as f:
+                chunks = json.load(f)
+            index = faiss.read_index(index_path)
+            if index.ntotal != len(chunks):
+                print(f"⚠️ Skipping {index_path}: {index.ntotal} vectors for {len(chunks)} chunks")
+                continue
+
+            self.replace(f"cmp_{row.group(1)}", chunks, index.reconstruct_n(0, index.ntotal))
+            imported += 1
+        return imported
+
+    def close(self):
+        self._mmap = None
+        self._conn.close()
+
+
+if __name__ == "__main__":
+    store = VectorStore()
+    print(f"Imported {store.import_legacy_files()} companies into {store.directory}")
+    store.compact()
+    store.close()